@@ -142,6 +142,22 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 CORS_ALLOW_ALL_ORIGINS = True
 
+# Compressed uploads are rejected once they decompress to more than this many bytes.
+UPLOAD_MAX_DECOMPRESSED_SIZE = config('UPLOAD_MAX_DECOMPRESSED_SIZE', default=20 * 1024 ** 3, cast=int)
+
+# Reject files from finalized uploads are deleted after this many days (pruned on each finalize).
+REJECT_RETENTION_DAYS = config('REJECT_RETENTION_DAYS', default=7, cast=int)
+
+# Tiered storage: rows older than ARCHIVE_AFTER_DAYS are moved to Parquet files under ARCHIVE_ROOT
+# by `python manage.py archive_vehicle_data` and merged back into reads transparently.
+ARCHIVE_ROOT = config('ARCHIVE_ROOT', default=os.path.join(BASE_DIR, 'archive'))
+ARCHIVE_AFTER_DAYS = config('ARCHIVE_AFTER_DAYS', default=90, cast=int)
+
+# Live SSE streams hold a worker thread each: cap them per process at half of GUNICORN_THREADS
+# so ordinary requests always find a free thread. Extra clients get a 503 and retry later.
+LIVE_MAX_STREAMS = config('LIVE_MAX_STREAMS', default=config('GUNICORN_THREADS', default=4, cast=int) // 2, cast=int)
+LIVE_RETRY_SECONDS = config('LIVE_RETRY_SECONDS', default=10, cast=int)
+
 LOGGING = {
     'version': 1,
     'disable_existing_loggers': False,
@@ -0,0 +1,126 @@
+"""
+Bandwidth vs CPU trade-off of compressed uploads and exports.
+
+Builds a synthetic telemetry CSV (same header and value shapes as the
+files in volteras_tech_challenge_data/) and, for every available codec and level,
+reports compression ratio, compress/decompress throughput, and the estimated
+end-to-end time to move the file over a few link speeds
+(compress + transfer + decompress).
+
+Usage:
+    python benchmarks/bench_compression.py [--size-mb 50] [--bandwidth-mbit 10 100 1000]
+"""
+import argparse
+import datetime
+import glob
+import io
+import os
+import random
+import sys
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+from vehicle_data.compression import compress_stream, decompress_chunks, zstandard, brotli  # noqa: E402
+
+DATA_DIR = os.path.join(os.path.dirname(BACKEND_DIR), 'volteras_tech_challenge_data')
+
+LEVELS = {
+    'gzip': [1, 6, 9],
+    'zstd': [1, 3, 9],
+    'br': [1, 4, 9],
+}
+
+
+def build_payload(size_mb, seed=0):
+    # Generate a telemetry CSV shaped like the sample files (random-walk values, ~1s sampling, NULL gaps).
+    rng = random.Random(seed)
+    with open(sorted(glob.glob(os.path.join(DATA_DIR, '*.csv')))[0], 'rb') as f:
+        header = f.readline().rstrip(b'\n')
+    target = size_mb * 1024 * 1024
+    out = [header]
+    size = len(header)
+    ts = datetime.datetime(2022, 7, 12, 16, 42, 25)
+    odometer, soc, elevation = 40800.6, 58, 92
+    while size < target:
+        ts += datetime.timedelta(milliseconds=rng.randint(500, 30000))
+        moving = rng.random() < 0.6
+        speed = f'{rng.randint(0, 120)}' if moving else 'NULL'
+        odometer += rng.random() * 0.5 if moving else 0
+        soc = max(0, min(100, soc + rng.choice((-1, 0, 0, 0, 1))))
+        elevation += rng.randint(-2, 2)
+        shift_state = rng.choice(('D', 'R', 'P', 'NULL')) if moving else 'NULL'
+        line = f"{ts.isoformat(' ', 'milliseconds')},{speed},{odometer:.1f},{soc},{elevation},{shift_state}".encode()
+        out.append(line)
+        size += len(line) + 1
+    return b'\n'.join(out) + b'\n'
+
+
+def available_codecs():
+    codecs = ['gzip']
+    if zstandard is not None:
+        codecs.append('zstd')
+    if brotli is not None:
+        codecs.append('br')
+    return codecs
+
+
+def bench(payload, codec, level, tmp_path):
+    # Compress the way the export view does (64KB pieces through compress_stream).
+    pieces = [payload[i:i + 65536] for i in range(0, len(payload), 65536)]
+    start = time.perf_counter()
+    compressed = b''.join(compress_stream(pieces, codec, level))
+    compress_s = time.perf_counter() - start
+    decompress_s = None
+    if codec != 'br':
+        # Decompress the way the finalize view does (1MB chunk files on disk).
+        with open(tmp_path, 'wb') as f:
+            f.write(compressed)
+        start = time.perf_counter()
+        out = io.BytesIO()
+        decompress_chunks([tmp_path], out, codec)
+        decompress_s = time.perf_counter() - start
+        assert out.getvalue() == payload
+    else:
+        start = time.perf_counter()
+        brotli.decompress(compressed)
+        decompress_s = time.perf_counter() - start
+    return len(compressed), compress_s, decompress_s
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--size-mb', type=int, default=50)
+    parser.add_argument('--bandwidth-mbit', type=float, nargs='+', default=[10, 100, 1000])
+    args = parser.parse_args()
+
+    payload = build_payload(args.size_mb)
+    raw_mb = len(payload) / 1024 / 1024
+    tmp_path = os.path.join(BACKEND_DIR, '.bench_compression.tmp')
+    print(f'payload: {raw_mb:.1f} MB CSV')
+    header = f"{'codec':<10}{'ratio':>7}{'comp MB/s':>11}{'decomp MB/s':>13}"
+    header += ''.join(f"{f'{bw:g}Mbit s':>12}" for bw in args.bandwidth_mbit)
+    print(header)
+
+    def transfer_s(nbytes, bw):
+        return nbytes * 8 / (bw * 1_000_000)
+
+    print(f"{'identity':<10}{1.0:>7.1f}{'-':>11}{'-':>13}" + ''.join(
+        f'{transfer_s(len(payload), bw):>12.2f}' for bw in args.bandwidth_mbit))
+    try:
+        for codec in available_codecs():
+            for level in LEVELS[codec]:
+                size, compress_s, decompress_s = bench(payload, codec, level, tmp_path)
+                line = f"{f'{codec}-{level}':<10}{len(payload) / size:>7.1f}"
+                line += f'{raw_mb / compress_s:>11.0f}{raw_mb / decompress_s:>13.0f}'
+                line += ''.join(
+                    f'{compress_s + transfer_s(size, bw) + decompress_s:>12.2f}' for bw in args.bandwidth_mbit)
+                print(line)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+if __name__ == '__main__':
+    main()
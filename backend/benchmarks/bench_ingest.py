@@ -0,0 +1,96 @@
+"""
+Throughput of the finalize validation stage (CSV -> validated rows -> COPY buffer).
+
+Builds a synthetic telemetry CSV (see bench_compression.py), then times:
+  - vectorized: iter_validated_batches + to_csv_bytes, as the finalize view runs it
+  - row-by-row: a csv.DictReader/DictWriter pass doing the same checks in Python,
+    the baseline the vectorized path has to beat
+
+Usage:
+    python benchmarks/bench_ingest.py [--rows 1000000] [--batch-size 100000]
+"""
+import argparse
+import csv
+import io
+import math
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from bench_compression import build_payload  # noqa: E402
+from vehicle_data.ingest import COPY_COLUMNS, REQUIRED_COLUMNS, iter_validated_batches, to_csv_bytes  # noqa: E402
+
+BYTES_PER_ROW = 48  # Rough size of one synthetic row, used to size the payload
+
+
+def run_vectorized(path, batch_size):
+    rows = rejected = 0
+    for valid, rejects in iter_validated_batches(path, 'bench', batch_size=batch_size):
+        to_csv_bytes(valid)
+        rows += len(valid)
+        rejected += len(rejects)
+    return rows, rejected
+
+
+def run_row_by_row(path):
+    # Baseline: the same checks one row at a time with the csv module.
+    rows = rejected = 0
+    out = csv.DictWriter(io.StringIO(), fieldnames=COPY_COLUMNS, extrasaction='ignore')
+    with open(path, 'r', encoding='utf-8-sig', newline='') as f:
+        for row in csv.DictReader(f):
+            try:
+                value = row['timestamp'].strip()
+                ts = datetime.fromisoformat(value)
+                if ts.tzinfo is None:
+                    ts = ts.replace(tzinfo=timezone.utc)
+                for column in ('odometer', 'soc', 'elevation'):
+                    if not math.isfinite(float(row[column])):
+                        raise ValueError(column)
+                if row['speed'] not in ('', 'NULL') and not math.isfinite(float(row['speed'])):
+                    raise ValueError('speed')
+                if len(row['shift_state']) > 20:
+                    raise ValueError('shift_state')
+            except (TypeError, ValueError):
+                rejected += 1
+                continue
+            row['vehicle_id'] = 'bench'
+            out.writerow(row)
+            rows += 1
+    return rows, rejected
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=1_000_000)
+    parser.add_argument('--batch-size', type=int, default=100_000)
+    args = parser.parse_args()
+
+    payload = build_payload(max(1, args.rows * BYTES_PER_ROW // (1024 * 1024)))
+    fd, path = tempfile.mkstemp(suffix='.csv')
+    with os.fdopen(fd, 'wb') as f:
+        f.write(payload)
+    size_mb = len(payload) / (1024 * 1024)
+    line_count = payload.count(b'\n') - 1
+    print(f"{line_count:,} rows, {size_mb:.1f} MB, columns {', '.join(REQUIRED_COLUMNS)}")
+    try:
+        for name, run in (
+            ('vectorized', lambda: run_vectorized(path, args.batch_size)),
+            ('row-by-row', lambda: run_row_by_row(path)),
+        ):
+            start = time.perf_counter()
+            rows, rejected = run()
+            elapsed = time.perf_counter() - start
+            print(f'{name:>11}: {elapsed:6.2f} s  {rows / elapsed:>10,.0f} rows/s  '
+                  f'{size_mb / elapsed:6.1f} MB/s  ({rows:,} valid, {rejected:,} rejected)')
+    finally:
+        os.remove(path)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,133 @@
+"""
+Startup cost of the backend: import time and per-worker boot time / memory.
+
+1. Import: time and RSS of a fresh process that loads the Django app and URLconf.
+   "eager" also imports the heavy libraries (what views.py used to do at module
+   load); "lazy" is the current code, where they load on first use.
+2. Gunicorn (Linux only): starts gunicorn with gunicorn.conf.py, with
+   GUNICORN_PRELOAD=0 (each worker imports and warms up on its own) and
+   GUNICORN_PRELOAD=1 (warm-up once in the master, workers fork from it).
+   For each, it reports the per-worker boot time from the worker log lines,
+   plus RSS and PSS per worker. PSS splits shared pages between processes,
+   so it shows what copy-on-write sharing saves.
+
+Usage:
+    python benchmarks/bench_startup.py [--runs 5] [--workers 4] [--skip-gunicorn]
+"""
+import argparse
+import os
+import re
+import socket
+import statistics
+import subprocess
+import sys
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+HEAVY_MODULES = ['pandas', 'numpy', 'pyarrow.parquet', 'dateutil.parser', 'pytz']
+
+IMPORT_SCRIPT = """
+import importlib, sys, time
+start = time.perf_counter()
+import django
+django.setup()
+from django.core.wsgi import get_wsgi_application
+get_wsgi_application()
+import backend_project.urls
+for name in sys.argv[1:]:
+    importlib.import_module(name)
+elapsed = time.perf_counter() - start
+rss = [l for l in open('/proc/self/status') if l.startswith('VmRSS')][0].split()[1]
+print(elapsed, int(rss) / 1024)
+"""
+
+
+def bench_env(**extra):
+    env = dict(os.environ)
+    env.setdefault('DJANGO_SETTINGS_MODULE', 'backend_project.settings')
+    # No database connection is opened; settings only require the variables to exist.
+    env.setdefault('DB_USER', 'bench')
+    env.setdefault('DB_PASSWORD', 'bench')
+    env.update(extra)
+    return env
+
+
+def bench_imports(runs):
+    print(f"{'import':<10}{'time ms':>10}{'RSS MB':>10}")
+    for mode, modules in (('eager', HEAVY_MODULES), ('lazy', [])):
+        times, rss = [], []
+        for _ in range(runs):
+            out = subprocess.run(
+                [sys.executable, '-c', IMPORT_SCRIPT, *modules],
+                cwd=BACKEND_DIR, env=bench_env(), capture_output=True, text=True, check=True,
+            ).stdout.split()
+            times.append(float(out[0]) * 1000)
+            rss.append(float(out[1]))
+        print(f'{mode:<10}{statistics.median(times):>10.0f}{statistics.median(rss):>10.1f}')
+
+
+def memory_mb(pid):
+    # (RSS, PSS) in MB from /proc/<pid>/smaps_rollup.
+    values = {}
+    with open(f'/proc/{pid}/smaps_rollup') as f:
+        for line in f:
+            parts = line.split()
+            if parts[0] in ('Rss:', 'Pss:'):
+                values[parts[0]] = int(parts[1]) / 1024
+    return values['Rss:'], values['Pss:']
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def bench_gunicorn(workers, timeout=60):
+    print(f"{'gunicorn':<12}{'ready ms':>10}{'boot ms/worker':>16}{'RSS MB/worker':>15}{'PSS MB/worker':>15}{'PSS MB total':>14}")
+    pattern = re.compile(r'Worker (\d+) booted in (\d+) ms')
+    for preload in ('0', '1'):
+        log_path = os.path.join(BACKEND_DIR, f'.bench_gunicorn_{preload}.log')
+        with open(log_path, 'w') as log:
+            start = time.monotonic()
+            proc = subprocess.Popen(
+                [sys.executable, '-m', 'gunicorn', 'backend_project.wsgi:application', '-c', 'gunicorn.conf.py',
+                 '--workers', str(workers), '--bind', f'127.0.0.1:{free_port()}'],
+                cwd=BACKEND_DIR, env=bench_env(GUNICORN_PRELOAD=preload), stdout=log, stderr=subprocess.STDOUT,
+            )
+        try:
+            booted = {}
+            while len(booted) < workers:
+                if time.monotonic() - start > timeout or proc.poll() is not None:
+                    raise RuntimeError(f'gunicorn did not boot, see {log_path}')
+                with open(log_path) as f:
+                    booted = {int(pid): int(ms) for pid, ms in pattern.findall(f.read())}
+                time.sleep(0.05)
+            ready_ms = (time.monotonic() - start) * 1000
+            time.sleep(1)  # Let workers settle before sampling memory
+            memory = [memory_mb(pid) for pid in booted]
+            rss = statistics.mean(m[0] for m in memory)
+            pss = statistics.mean(m[1] for m in memory)
+            pss_total = sum(m[1] for m in memory) + memory_mb(proc.pid)[1]
+            label = 'preload' if preload == '1' else 'no-preload'
+            print(f'{label:<12}{ready_ms:>10.0f}{statistics.mean(booted.values()):>16.0f}{rss:>15.1f}{pss:>15.1f}{pss_total:>14.1f}')
+        finally:
+            proc.terminate()
+            proc.wait()
+            os.remove(log_path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--skip-gunicorn', action='store_true')
+    args = parser.parse_args()
+    bench_imports(args.runs)
+    if not args.skip_gunicorn:
+        print()
+        bench_gunicorn(args.workers)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,68 @@
+"""
+Gunicorn configuration for the Volteras backend.
+
+The app is preloaded in the master process and the heavy libraries that views
+import lazily (pandas, pyarrow, ...) are warmed up there before workers fork.
+Workers then share those code pages copy-on-write instead of each paying the
+import time and memory. gc.freeze() keeps the garbage collector from touching
+(and so copying) the preloaded objects in every worker.
+
+Environment variables:
+    GUNICORN_BIND          address to bind (default 0.0.0.0:8000)
+    WEB_CONCURRENCY        number of worker processes (default 2 * CPUs + 1)
+    GUNICORN_THREADS       threads per worker (default 4); SSE streams hold a thread each,
+                           so at most LIVE_MAX_STREAMS (default threads // 2) run per worker
+    GUNICORN_PRELOAD       preload and warm up in the master (default true)
+    GUNICORN_WARM_MODULES  comma-separated modules imported before serving
+"""
+import gc
+import importlib
+import multiprocessing
+import time
+
+# Imported as a module: gunicorn treats top-level names as settings, and `config` is one.
+import decouple
+
+bind = decouple.config('GUNICORN_BIND', default='0.0.0.0:8000')
+workers = decouple.config('WEB_CONCURRENCY', default=multiprocessing.cpu_count() * 2 + 1, cast=int)
+worker_class = 'gthread'
+threads = decouple.config('GUNICORN_THREADS', default=4, cast=int)
+preload_app = decouple.config('GUNICORN_PRELOAD', default=True, cast=bool)
+
+WARM_MODULES = decouple.config(
+    'GUNICORN_WARM_MODULES',
+    default='backend_project.urls,vehicle_data.views,pandas,numpy,pyarrow.parquet,dateutil.parser,pytz',
+    cast=decouple.Csv(),
+)
+
+
+def warm_up(log):
+    # Import modules that are otherwise loaded on first use.
+    start = time.monotonic()
+    for name in WARM_MODULES:
+        try:
+            importlib.import_module(name)
+        except ImportError as e:
+            log.warning(f"Skipping warm-up of {name}: {e}")
+    log.info(f"Warmed up {len(WARM_MODULES)} modules in {(time.monotonic() - start) * 1000:.0f} ms")
+
+
+def when_ready(server):
+    # Runs in the master after the app is loaded and before workers are forked.
+    if not preload_app:
+        return
+    from django.db import connections
+    warm_up(server.log)
+    connections.close_all()  # Never share a database socket across forks
+    gc.freeze()
+
+
+def post_fork(server, worker):
+    worker.boot_started = time.monotonic()
+
+
+def post_worker_init(worker):
+    # Without preload every worker loads and warms up on its own.
+    if not preload_app:
+        warm_up(worker.log)
+    worker.log.info(f"Worker {worker.pid} booted in {(time.monotonic() - worker.boot_started) * 1000:.0f} ms")
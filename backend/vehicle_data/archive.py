@@ -0,0 +1,441 @@
+import contextlib
+import functools
+import heapq
+import json
+import os
+from datetime import datetime
+from itertools import islice
+from urllib.parse import quote
+
+from django.conf import settings
+
+from .models import VehicleData
+
+# Cold telemetry lives in ARCHIVE_ROOT/<vehicle_id>/<YYYY-MM>.parquet, one file per vehicle and month.
+# manifest.json lists every partition with its time range so reads can skip files without opening them.
+MANIFEST_NAME = 'manifest.json'
+ROW_GROUP_SIZE = 64 * 1024  # Small enough that timestamp statistics prune most row groups
+
+FIELDS = ['id', 'vehicle_id', 'timestamp', 'speed', 'odometer', 'soc', 'elevation', 'shift_state']
+
+# pandas/pyarrow are imported on first use: list requests only need the manifest,
+# and most never touch a Parquet file.
+
+
+def parquet_schema():
+    import pyarrow as pa
+    return pa.schema([
+        ('id', pa.int64()),
+        ('vehicle_id', pa.string()),
+        ('timestamp', pa.timestamp('us', tz='UTC')),
+        ('speed', pa.float64()),
+        ('odometer', pa.float64()),
+        ('soc', pa.int64()),
+        ('elevation', pa.float64()),
+        ('shift_state', pa.string()),
+    ])
+
+
+_manifest_cache = {'key': None, 'partitions': []}
+
+
+def archive_root():
+    return settings.ARCHIVE_ROOT
+
+
+def manifest_path():
+    return os.path.join(archive_root(), MANIFEST_NAME)
+
+
+def partition_path(vehicle_id, month):
+    # Relative path of the Parquet file for one vehicle and month ('YYYY-MM').
+    # vehicle_id is percent-encoded into a single path component; '.' and '..' are encoded too,
+    # and the result is checked to stay under ARCHIVE_ROOT.
+    directory = quote(vehicle_id, safe='')
+    if directory in ('', '.', '..'):
+        directory = directory.replace('.', '%2E') or '%00'
+    relative_path = os.path.join(directory, f'{month}.parquet')
+    root = os.path.realpath(archive_root())
+    if os.path.commonpath([root, os.path.realpath(os.path.join(root, relative_path))]) != root:
+        raise ValueError(f'Invalid archive partition: {vehicle_id!r} {month!r}')
+    return relative_path
+
+
+def load_manifest():
+    # Return the list of archived partitions; cached until manifest.json changes on disk.
+    path = manifest_path()
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return []
+    key = (path, stat.st_mtime_ns, stat.st_size)
+    if _manifest_cache['key'] != key:
+        with open(path, 'r', encoding='utf-8') as f:
+            partitions = json.load(f)['partitions']
+        for entry in partitions:
+            entry['min_dt'] = datetime.fromisoformat(entry['min_timestamp'])
+            entry['max_dt'] = datetime.fromisoformat(entry['max_timestamp'])
+        _manifest_cache.update(key=key, partitions=partitions)
+    return _manifest_cache['partitions']
+
+
+def save_manifest(partitions):
+    # Atomically replace manifest.json so readers never see a partial file.
+    os.makedirs(archive_root(), exist_ok=True)
+    fields = ('vehicle_id', 'month', 'path', 'min_timestamp', 'max_timestamp', 'rows')
+    data = {'partitions': [{k: entry[k] for k in fields} for entry in partitions]}
+    tmp_path = manifest_path() + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, indent=2)
+    os.replace(tmp_path, manifest_path())
+
+
+def _record_batches(rows, size):
+    # Group an iterable of row dicts (FIELDS) into pyarrow tables of at most `size` rows.
+    import pyarrow as pa
+    schema = parquet_schema()
+    iterator = iter(rows)
+    while True:
+        batch = list(islice(iterator, size))
+        if not batch:
+            return
+        yield pa.Table.from_pylist(batch, schema=schema)
+
+
+def _merge_sorted(existing, new):
+    # Merge two streams of tables sorted by (unique) timestamp into one sorted stream.
+    # On equal timestamps the new row replaces the existing one. Each step emits everything
+    # up to the smaller of the two buffers' last timestamps, so at most about one batch per
+    # side is held in memory.
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    sources = [iter(existing), iter(new)]
+    buffers = [None, None]
+    while True:
+        for side in (0, 1):
+            while sources[side] is not None and (buffers[side] is None or buffers[side].num_rows == 0):
+                buffers[side] = next(sources[side], None)
+                if buffers[side] is None:
+                    sources[side] = None
+        old, fresh = (buffer if buffer is not None and buffer.num_rows else None for buffer in buffers)
+        if old is None or fresh is None:
+            if old is not None or fresh is not None:
+                yield old if old is not None else fresh
+            buffers = [None, None]
+            if sources == [None, None]:
+                return
+            continue
+        cut = min(old['timestamp'][-1].as_py(), fresh['timestamp'][-1].as_py())
+        old_head = old.filter(pc.less_equal(old['timestamp'], cut))
+        fresh_head = fresh.filter(pc.less_equal(fresh['timestamp'], cut))
+        buffers = [old.slice(old_head.num_rows), fresh.slice(fresh_head.num_rows)]
+        kept = old_head.filter(pc.invert(pc.is_in(old_head['timestamp'], value_set=fresh_head['timestamp'])))
+        yield pa.concat_tables([kept, fresh_head]).sort_by('timestamp')
+
+
+def _row_groups_of(tables, size):
+    # Re-cut a stream of tables into tables of exactly `size` rows (the last may be shorter).
+    import pyarrow as pa
+    pending = []
+    pending_rows = 0
+    for table in tables:
+        pending.append(table)
+        pending_rows += table.num_rows
+        while pending_rows >= size:
+            combined = pa.concat_tables(pending)
+            yield combined.slice(0, size)
+            pending = [combined.slice(size)]
+            pending_rows -= size
+    if pending_rows:
+        yield pa.concat_tables(pending)
+
+
+def write_partition(vehicle_id, month, rows):
+    # Write rows (dicts with FIELDS, in timestamp order, e.g. a QuerySet.values() iterator) to the
+    # vehicle/month Parquet file and record it in the manifest. Rows are streamed: they are merged
+    # with the existing file and written row group by row group, never loaded all at once.
+    # Rows already archived for the same timestamp are replaced, so re-running an archive is idempotent.
+    # Returns the manifest entry, or None if there was nothing to write.
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    relative_path = partition_path(vehicle_id, month)
+    path = os.path.join(archive_root(), relative_path)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    schema = parquet_schema()
+    batches = _record_batches(rows, ROW_GROUP_SIZE)
+    existing_file = pq.ParquetFile(path) if os.path.exists(path) else None
+    if existing_file is not None:
+        existing = (
+            pa.Table.from_batches([batch]).cast(schema)
+            for batch in existing_file.iter_batches(ROW_GROUP_SIZE, columns=FIELDS)
+        )
+        batches = _merge_sorted(existing, batches)
+    tmp_path = path + '.tmp'
+    first_timestamp = last_timestamp = None
+    total = 0
+    with contextlib.ExitStack() as stack:
+        if existing_file is not None:
+            stack.callback(existing_file.close)
+        writer = stack.enter_context(pq.ParquetWriter(tmp_path, schema, compression='zstd'))
+        for table in _row_groups_of(batches, ROW_GROUP_SIZE):
+            writer.write_table(table, row_group_size=ROW_GROUP_SIZE)
+            if first_timestamp is None:
+                first_timestamp = table['timestamp'][0].as_py()
+            last_timestamp = table['timestamp'][-1].as_py()
+            total += table.num_rows
+    if not total:
+        os.remove(tmp_path)
+        return None
+    os.replace(tmp_path, path)
+
+    entry = {
+        'vehicle_id': vehicle_id,
+        'month': month,
+        'path': relative_path,
+        'min_timestamp': first_timestamp.isoformat(),
+        'max_timestamp': last_timestamp.isoformat(),
+        'rows': total,
+    }
+    partitions = [p for p in load_manifest() if (p['vehicle_id'], p['month']) != (vehicle_id, month)]
+    partitions.append(entry)
+    partitions.sort(key=lambda p: (p['vehicle_id'], p['month']))
+    save_manifest(partitions)
+    return entry
+
+
+def archived_vehicle_ids():
+    return sorted({entry['vehicle_id'] for entry in load_manifest()})
+
+
+def _full_path(entry):
+    return os.path.join(archive_root(), entry['path'])
+
+
+def _overlaps(low, high, start, end):
+    return not ((start and high < start) or (end and low > end))
+
+
+def _within(low, high, start, end):
+    return (not start or low >= start) and (not end or high <= end)
+
+
+def matching_partitions(vehicle_id=None, start=None, end=None):
+    # Manifest entries that may hold rows for the vehicle and time range (no file is opened).
+    return [
+        entry for entry in load_manifest()
+        if (not vehicle_id or entry['vehicle_id'] == vehicle_id)
+        and _overlaps(entry['min_dt'], entry['max_dt'], start, end)
+    ]
+
+
+def row_groups(entry):
+    # (min timestamp, max timestamp, rows) per row group, read from the Parquet footer.
+    # Cached on the manifest entry, which lives until manifest.json changes.
+    if '_row_groups' not in entry:
+        import pyarrow.parquet as pq
+        metadata = pq.ParquetFile(_full_path(entry)).metadata
+        column = metadata.schema.to_arrow_schema().get_field_index('timestamp')
+        groups = []
+        for index in range(metadata.num_row_groups):
+            row_group = metadata.row_group(index)
+            statistics = row_group.column(column).statistics
+            groups.append((statistics.min, statistics.max, row_group.num_rows))
+        entry['_row_groups'] = groups
+    return entry['_row_groups']
+
+
+def _in_range(table, start, end):
+    # Keep only the rows of a pyarrow table or batch with start <= timestamp <= end.
+    import pyarrow.compute as pc
+    mask = None
+    if start:
+        mask = pc.greater_equal(table['timestamp'], start)
+    if end:
+        upper = pc.less_equal(table['timestamp'], end)
+        mask = upper if mask is None else pc.and_(mask, upper)
+    return table if mask is None else table.filter(mask)
+
+
+def count_archived(vehicle_id=None, start=None, end=None, partitions=None):
+    # Count archived rows from manifest and row-group totals. Only row groups that straddle
+    # start or end are read, and only their timestamp column.
+    import pyarrow.parquet as pq
+    if partitions is None:
+        partitions = matching_partitions(vehicle_id, start, end)
+    total = 0
+    for entry in partitions:
+        if _within(entry['min_dt'], entry['max_dt'], start, end):
+            total += entry['rows']
+            continue
+        parquet_file = None
+        for index, (low, high, rows) in enumerate(row_groups(entry)):
+            if not _overlaps(low, high, start, end):
+                continue
+            if _within(low, high, start, end):
+                total += rows
+                continue
+            parquet_file = parquet_file or pq.ParquetFile(_full_path(entry))
+            total += _in_range(parquet_file.read_row_group(index, columns=['timestamp']), start, end).num_rows
+    return total
+
+
+def iter_partition(entry, start=None, end=None, descending=False, columns=None, batch_size=4096):
+    # Yield one partition's rows (dicts) in timestamp order, reading one row group at a time
+    # and skipping row groups outside the range. Ascending reads stream in small batches.
+    import pyarrow.parquet as pq
+    parquet_file = pq.ParquetFile(_full_path(entry))
+    indexes = [i for i, (low, high, rows) in enumerate(row_groups(entry)) if _overlaps(low, high, start, end)]
+    if descending:
+        for index in reversed(indexes):
+            rows = _in_range(parquet_file.read_row_group(index, columns=columns), start, end).to_pylist()
+            yield from reversed(rows)
+        return
+    for index in indexes:
+        for batch in parquet_file.iter_batches(batch_size=batch_size, row_groups=[index], columns=columns):
+            yield from _in_range(batch, start, end).to_pylist()
+
+
+def iter_archived(vehicle_id=None, start=None, end=None, columns=None):
+    # Yield archived rows (dicts) matching the filters, partition by partition.
+    # The manifest prunes whole files; row-group statistics prune within a file.
+    for entry in matching_partitions(vehicle_id, start, end):
+        yield from iter_partition(entry, start, end, columns=columns)
+
+
+def read_archived(vehicle_id=None, start=None, end=None):
+    return list(iter_archived(vehicle_id, start, end))
+
+
+def is_archived(vehicle_id, timestamp):
+    # True if the archive already holds a row for this vehicle and timestamp.
+    return count_archived(vehicle_id, timestamp, timestamp) > 0
+
+
+def merge_by_timestamp(partitions, key, start=None, end=None, descending=False):
+    # Merge partitions into one stream in query order (timestamp first). Each partition is
+    # opened only once the merge reaches its time range, so the first page of a fleet-wide
+    # list reads a handful of row groups rather than every file.
+    def first_timestamp(entry):
+        return entry['max_dt'] if descending else entry['min_dt']
+
+    pending = sorted(partitions, key=first_timestamp, reverse=descending)
+    heap = []
+    sequence = 0
+
+    def push(rows):
+        nonlocal sequence
+        for row in rows:
+            heapq.heappush(heap, (key(row), sequence, row, rows))
+            sequence += 1
+            return
+
+    while pending or heap:
+        while pending and (not heap or (
+            first_timestamp(pending[0]) >= heap[0][2]['timestamp'] if descending
+            else first_timestamp(pending[0]) <= heap[0][2]['timestamp']
+        )):
+            push(iter_partition(pending.pop(0), start, end, descending))
+        if not heap:
+            continue
+        _, _, row, rows = heapq.heappop(heap)
+        yield row
+        push(rows)
+
+
+def _compare(a, b, ordering, getter):
+    # Compare two rows like PostgreSQL ORDER BY: NULLs last ascending, first descending.
+    for field in ordering:
+        descending = field.startswith('-')
+        name = field.lstrip('-')
+        x, y = getter(a, name), getter(b, name)
+        if x == y:
+            continue
+        if x is None:
+            result = 1
+        elif y is None:
+            result = -1
+        else:
+            result = -1 if x < y else 1
+        return -result if descending else result
+    return 0
+
+
+def _dict_getter(row, name):
+    return row[name]
+
+
+def _model_getter(obj, name):
+    return getattr(obj, name)
+
+
+# TieredQuerySet: Read-only view over live rows (a QuerySet) plus archived Parquet rows.
+# Supports what pagination and exports need: count(), slicing, and iteration in query order.
+# Archived rows are read lazily: count() comes from the manifest and row-group statistics,
+# and in timestamp order a slice or export reads only the row groups it reaches.
+# Other orderings have to scan every matching archived row (keeping only `stop` of them for a slice).
+class TieredQuerySet:
+    ordered = True
+
+    def __init__(self, queryset, partitions, start=None, end=None):
+        if not queryset.ordered:
+            queryset = queryset.order_by('timestamp')  # Archived rows are stored in timestamp order
+        self.queryset = queryset
+        self.model = queryset.model
+        self.partitions = partitions
+        self.start, self.end = start, end
+        self.ordering = ['id' if f == 'pk' else '-id' if f == '-pk' else f for f in queryset.query.order_by]
+        self._count = None
+
+    def _dict_key(self):
+        return functools.cmp_to_key(lambda a, b: _compare(a, b, self.ordering, _dict_getter))
+
+    def _model_key(self):
+        return functools.cmp_to_key(lambda a, b: _compare(a, b, self.ordering, _model_getter))
+
+    def archived(self, limit=None):
+        # Archived rows (dicts) in query order; only the first `limit` are needed.
+        if self.ordering[0].lstrip('-') == 'timestamp':
+            descending = self.ordering[0].startswith('-')
+            rows = merge_by_timestamp(self.partitions, self._dict_key(), self.start, self.end, descending)
+            return islice(rows, limit)
+        rows = (row for entry in self.partitions for row in iter_partition(entry, self.start, self.end))
+        if limit is None:
+            return iter(sorted(rows, key=self._dict_key()))
+        return iter(heapq.nsmallest(limit, rows, key=self._dict_key()))
+
+    def count(self):
+        if self._count is None:
+            self._count = self.queryset.count() + count_archived(
+                start=self.start, end=self.end, partitions=self.partitions,
+            )
+        return self._count
+
+    def __len__(self):
+        return self.count()
+
+    def __getitem__(self, index):
+        # Merge the first `stop` rows of each tier, then cut out the requested slice.
+        if isinstance(index, int):
+            return self[index:index + 1][0]
+        start, stop = index.start or 0, index.stop
+        live = self.queryset[:stop] if stop is not None else self.queryset
+        archived = (VehicleData(**row) for row in self.archived(stop))
+        merged = heapq.merge(live, archived, key=self._model_key())
+        return list(islice(merged, start, stop))
+
+    def __iter__(self):
+        return iter(self[0:None])
+
+    def values_iterator(self, chunk_size=2000):
+        # Yield merged rows as dicts (like QuerySet.values()) without loading either tier.
+        live = self.queryset.values().iterator(chunk_size=chunk_size)
+        return heapq.merge(live, self.archived(), key=self._dict_key())
+
+
+def with_archive(queryset, vehicle_id=None, start=None, end=None):
+    # Wrap a filtered queryset so archived rows matching the same filters are merged in.
+    # Returns the queryset unchanged when no archived partition matches.
+    partitions = matching_partitions(vehicle_id, start, end)
+    if not partitions:
+        return queryset
+    return TieredQuerySet(queryset, partitions, start, end)
@@ -0,0 +1,321 @@
+import gzip
+import io
+import shutil
+import zlib
+
+# Optional codecs: zstd and brotli are only offered when their packages are installed.
+try:
+    import zstandard
+except ImportError:  # pragma: no cover - depends on the environment
+    zstandard = None
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - depends on the environment
+    brotli = None
+
+GZIP_MAGIC = b'\x1f\x8b'
+ZSTD_MAGIC = b'\x28\xb5\x2f\xfd'
+
+# Preferred order when the client accepts several encodings with the same quality.
+RESPONSE_ENCODINGS = ('zstd', 'br', 'gzip')
+
+
+def available_upload_encodings():
+    # Encodings accepted for chunked uploads ('identity' means raw CSV).
+    encodings = ['identity', 'gzip']
+    if zstandard is not None:
+        encodings.append('zstd')
+    return encodings
+
+
+def available_response_encodings():
+    # Encodings the export endpoint can produce, in server preference order.
+    return [e for e in RESPONSE_ENCODINGS if (
+        e == 'gzip'
+        or (e == 'zstd' and zstandard is not None)
+        or (e == 'br' and brotli is not None)
+    )]
+
+
+def sniff_encoding(head):
+    # Detect gzip/zstd streams from their magic bytes; anything else is treated as raw CSV.
+    if head.startswith(GZIP_MAGIC):
+        return 'gzip'
+    if head.startswith(ZSTD_MAGIC):
+        return 'zstd'
+    return 'identity'
+
+
+# Upper bound on the decompressed size of one upload (guards against compression bombs).
+DEFAULT_MAX_DECOMPRESSED_SIZE = 20 * 1024 ** 3
+
+
+class DecompressionError(ValueError):
+    # Corrupt, truncated, or oversized compressed upload.
+    pass
+
+
+class _ChunkFileReader(io.RawIOBase):
+    # Reads a list of chunk files as one continuous stream, reporting every read to on_read.
+    def __init__(self, paths, on_read=None):
+        self._paths = list(paths)
+        self._file = None
+        self._on_read = on_read
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        while True:
+            if self._file is None:
+                if not self._paths:
+                    return 0
+                self._file = open(self._paths.pop(0), 'rb')
+            n = self._file.readinto(buffer)
+            if n:
+                if self._on_read is not None:
+                    self._on_read(bytes(buffer[:n]))
+                return n
+            self._file.close()
+            self._file = None
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        super().close()
+
+
+class _ZstdFrameTracker:
+    # Follows zstd frame and block headers in the compressed bytes (without decompressing)
+    # to tell whether the stream ends on a frame boundary. zstandard's stream reader stops
+    # silently on truncated input, so this is how truncation and trailing garbage are detected.
+    ZSTD_FRAME_MAGIC = 0xFD2FB528
+    SKIPPABLE_MAGIC_MASK = 0xFFFFFFF0
+    SKIPPABLE_MAGIC = 0x184D2A50
+
+    def __init__(self):
+        self.state = 'magic'
+        self.need = 4  # Header bytes needed for the current state
+        self.buffer = b''
+        self.skip = 0  # Payload bytes to skip before the next header
+        self.checksum = False
+
+    def feed(self, data):
+        pos = 0
+        while pos < len(data):
+            if self.skip:
+                n = min(self.skip, len(data) - pos)
+                self.skip -= n
+                pos += n
+                continue
+            take = min(self.need - len(self.buffer), len(data) - pos)
+            self.buffer += data[pos:pos + take]
+            pos += take
+            if len(self.buffer) == self.need:
+                header, self.buffer = self.buffer, b''
+                self._advance(header)
+
+    def _advance(self, header):
+        value = int.from_bytes(header, 'little')
+        if self.state == 'magic':
+            if value == self.ZSTD_FRAME_MAGIC:
+                self.state, self.need = 'descriptor', 1
+            elif value & self.SKIPPABLE_MAGIC_MASK == self.SKIPPABLE_MAGIC:
+                self.state, self.need = 'skippable', 4
+            else:
+                raise ValueError('Invalid zstd data: unexpected bytes after the last frame.')
+        elif self.state == 'skippable':
+            self.skip = value
+            self.state, self.need = 'magic', 4
+        elif self.state == 'descriptor':
+            single_segment = (value >> 5) & 1
+            self.checksum = bool((value >> 2) & 1)
+            dictionary_id_size = (0, 1, 2, 4)[value & 3]
+            content_size_size = (single_segment, 2, 4, 8)[value >> 6]
+            self.skip = (1 - single_segment) + dictionary_id_size + content_size_size
+            self.state, self.need = 'block', 3
+        elif self.state == 'block':
+            last, block_type, size = value & 1, (value >> 1) & 3, value >> 3
+            if block_type == 3:
+                raise ValueError('Invalid zstd data: reserved block type.')
+            self.skip = 1 if block_type == 1 else size  # RLE blocks store a single byte
+            if last:
+                self.skip += 4 if self.checksum else 0
+                self.state, self.need = 'magic', 4
+
+    def finish(self):
+        if self.state != 'magic' or self.buffer or self.skip:
+            raise ValueError('Compressed upload is truncated.')
+
+
+def _open_decompressed(source_paths, encoding):
+    # Return (stream, finish, source): a file-like object yielding decompressed bytes, a
+    # callable that raises ValueError if the input ended early, and the chunk reader to close.
+    if encoding in (None, '', 'identity'):
+        source = _ChunkFileReader(source_paths)
+        return io.BufferedReader(source), lambda: None, source
+    if encoding == 'gzip':
+        # GzipFile reads multi-member streams (e.g. `cat a.gz b.gz`) and raises on truncation.
+        source = _ChunkFileReader(source_paths)
+        return gzip.GzipFile(fileobj=source, mode='rb'), lambda: None, source
+    if encoding == 'zstd' and zstandard is not None:
+        tracker = _ZstdFrameTracker()
+        source = _ChunkFileReader(source_paths, on_read=tracker.feed)
+        stream = zstandard.ZstdDecompressor().stream_reader(source, read_across_frames=True)
+        return stream, tracker.finish, source
+    raise DecompressionError(f'Unsupported encoding: {encoding}')
+
+
+class _CheckedReader(io.RawIOBase):
+    # Wraps a decompressed stream: counts output bytes against max_size, runs the end-of-input
+    # check, and turns codec errors into DecompressionError.
+    def __init__(self, stream, finish, source, max_size):
+        self._stream = stream
+        self._finish = finish
+        self._source = source
+        self._max_size = max_size
+        self._total = 0
+        self._done = False
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        if self._done:
+            return 0
+        try:
+            data = self._stream.read(len(buffer))
+            if not data:
+                self._done = True
+                self._finish()
+                return 0
+        except DecompressionError:
+            raise
+        except EOFError:
+            raise DecompressionError('Compressed upload is truncated.')
+        except (zlib.error, gzip.BadGzipFile) as e:
+            raise DecompressionError(f'Invalid gzip data: {e}')
+        except ValueError as e:  # From _ZstdFrameTracker
+            raise DecompressionError(str(e))
+        except Exception as e:
+            if zstandard is not None and isinstance(e, zstandard.ZstdError):
+                raise DecompressionError(f'Invalid zstd data: {e}')
+            raise
+        self._total += len(data)
+        if self._total > self._max_size:
+            raise DecompressionError(f'Decompressed upload exceeds {self._max_size} bytes.')
+        buffer[:len(data)] = data
+        return len(data)
+
+    def close(self):
+        self._stream.close()
+        self._source.close()  # GzipFile leaves its fileobj open
+        super().close()
+
+
+def open_upload(chunk_paths, encoding=None, read_size=1024 * 1024, max_size=DEFAULT_MAX_DECOMPRESSED_SIZE):
+    # Open the chunk files, in order, as one stream of decompressed bytes (binary file object).
+    # Nothing is written to disk: callers read the upload incrementally, read_size bytes at a time.
+    # If encoding is None it is sniffed from the first bytes of the first chunk.
+    # Corrupt, truncated, or oversized (> max_size decompressed bytes) input raises
+    # DecompressionError (a ValueError) from read().
+    if encoding is None:
+        head = b''
+        if chunk_paths:
+            with open(chunk_paths[0], 'rb') as first_chunk:
+                head = first_chunk.read(len(ZSTD_MAGIC))
+        encoding = sniff_encoding(head)
+    stream, finish, source = _open_decompressed(chunk_paths, encoding)
+    return io.BufferedReader(_CheckedReader(stream, finish, source, max_size), buffer_size=read_size)
+
+
+def decompress_chunks(chunk_paths, out_file, encoding=None, read_size=1024 * 1024,
+                      max_size=DEFAULT_MAX_DECOMPRESSED_SIZE):
+    # Stream the chunk files, in order, through a decompressor into out_file (see open_upload).
+    with open_upload(chunk_paths, encoding, read_size, max_size) as stream:
+        shutil.copyfileobj(stream, out_file, read_size)
+
+
+class _ZstdCompressor:
+    def __init__(self, level):
+        self._obj = zstandard.ZstdCompressor(level=level).compressobj()
+
+    def compress(self, data):
+        return self._obj.compress(data)
+
+    def flush(self):
+        return self._obj.flush()
+
+
+class _BrotliCompressor:
+    def __init__(self, quality):
+        self._obj = brotli.Compressor(quality=quality)
+
+    def compress(self, data):
+        return self._obj.process(data)
+
+    def flush(self):
+        return self._obj.finish()
+
+
+def get_compressor(encoding, level=None):
+    # Return an incremental compressor for a response encoding.
+    # Default levels favour throughput: exports are generated on the fly.
+    if encoding == 'gzip':
+        return zlib.compressobj(6 if level is None else level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    if encoding == 'zstd' and zstandard is not None:
+        return _ZstdCompressor(3 if level is None else level)
+    if encoding == 'br' and brotli is not None:
+        return _BrotliCompressor(4 if level is None else level)
+    raise ValueError(f'Unsupported encoding: {encoding}')
+
+
+def compress_stream(chunks, encoding, level=None, min_flush_size=64 * 1024):
+    # Compress an iterable of str/bytes pieces, yielding compressed blocks as they fill up.
+    # Small pieces (e.g. one CSV row) are batched so each yielded block is worth sending.
+    compressor = get_compressor(encoding, level)
+    pending = []
+    pending_size = 0
+    for chunk in chunks:
+        if isinstance(chunk, str):
+            chunk = chunk.encode('utf-8')
+        out = compressor.compress(chunk)
+        if out:
+            pending.append(out)
+            pending_size += len(out)
+        if pending_size >= min_flush_size:
+            yield b''.join(pending)
+            pending = []
+            pending_size = 0
+    pending.append(compressor.flush())
+    yield b''.join(pending)
+
+
+def negotiate_encoding(accept_encoding):
+    # Pick the best response encoding from an Accept-Encoding header, or None for identity.
+    if not accept_encoding:
+        return None
+    qualities = {}
+    for item in accept_encoding.split(','):
+        parts = item.strip().split(';')
+        coding = parts[0].strip().lower()
+        if not coding:
+            continue
+        q = 1.0
+        for param in parts[1:]:
+            name, _, value = param.strip().partition('=')
+            if name.strip() == 'q':
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        qualities[coding] = q
+    best = None
+    best_q = 0.0
+    for encoding in available_response_encodings():
+        q = qualities.get(encoding, qualities.get('*', 0.0))
+        if q > best_q:
+            best, best_q = encoding, q
+    return best
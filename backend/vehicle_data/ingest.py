@@ -0,0 +1,266 @@
+import contextlib
+import csv
+import os
+import time
+from datetime import timezone
+from itertools import islice
+
+from django.conf import settings
+
+# pyarrow/pandas/numpy are imported inside the functions that need them: this module is imported
+# by views.py, and only the finalize upload path needs them.
+# Validation runs on pyarrow string arrays: splitting, trimming, and the checks are C++ kernels,
+# and valid values are passed through to COPY as the original strings (PostgreSQL parses them
+# again anyway), so no per-value Python objects are built on the happy path.
+
+# Columns every uploaded CSV must provide, and the column order used for COPY.
+REQUIRED_COLUMNS = ['timestamp', 'speed', 'odometer', 'soc', 'elevation', 'shift_state']
+COPY_COLUMNS = REQUIRED_COLUMNS + ['vehicle_id']
+REJECT_COLUMNS = ['line', 'reason', 'raw']
+
+# Numeric columns and whether a value is required (mirrors the VehicleData model).
+NUMERIC_COLUMNS = [('speed', False), ('odometer', True), ('soc', True), ('elevation', True)]
+SOC_MAX = 2 ** 31 - 1  # soc is an integer column
+SHIFT_STATE_MAX_LENGTH = 20
+
+DEFAULT_BATCH_SIZE = 100_000  # Lines validated per vectorized batch
+
+# Numbers PostgreSQL reads as a finite float; 'inf'/'nan' are rejected like before.
+NUMBER_PATTERN = r'^[+-]?(\d+\.?\d*|\.\d+)([eE][+-]?\d+)?$'
+
+
+class MissingColumnsError(ValueError):
+    pass
+
+
+def reject_file_path(reject_id):
+    # Location of the downloadable reject file for one finalized upload.
+    return os.path.join(settings.MEDIA_ROOT, 'rejects', f'{reject_id}.csv')
+
+
+def prune_reject_files(max_age_days=None):
+    # Delete reject files older than max_age_days (default settings.REJECT_RETENTION_DAYS).
+    # Returns the number of files removed.
+    if max_age_days is None:
+        max_age_days = settings.REJECT_RETENTION_DAYS
+    reject_dir = os.path.dirname(reject_file_path('x'))
+    cutoff = time.time() - max_age_days * 86400
+    removed = 0
+    try:
+        entries = list(os.scandir(reject_dir))
+    except FileNotFoundError:
+        return 0
+    for entry in entries:
+        if entry.is_file() and entry.name.endswith('.csv') and entry.stat().st_mtime < cutoff:
+            try:
+                os.remove(entry.path)
+                removed += 1
+            except FileNotFoundError:
+                pass  # Removed concurrently by another worker
+    return removed
+
+
+def _missing_to_null(values):
+    # Strip values and turn '' / 'NULL' (any case) into nulls.
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    stripped = pc.utf8_trim_whitespace(values)
+    missing = pc.or_(pc.equal(stripped, ''), pc.equal(pc.ascii_upper(stripped), 'NULL'))
+    return pc.if_else(missing, pa.scalar(None, pa.string()), stripped)
+
+
+def _to_arrow(lines):
+    # Build a pyarrow string array from decoded lines. Lines holding invalid UTF-8 (decoded with
+    # surrogateescape) cannot be encoded: they are blanked and returned as {index: printable text}.
+    import pyarrow as pa
+    try:
+        return pa.array(lines, pa.string()), {}
+    except UnicodeEncodeError:
+        pass
+    invalid = {}
+    clean = []
+    for i, line in enumerate(lines):
+        try:
+            line.encode('utf-8')
+        except UnicodeEncodeError:
+            invalid[i] = line.encode('utf-8', 'surrogateescape').decode('utf-8', 'replace').rstrip('\r\n')
+            line = ''
+        clean.append(line)
+    return pa.array(clean, pa.string()), invalid
+
+
+def split_lines(lines, header, first_line):
+    # Split raw CSV lines into a pyarrow table of strings with a 'line' column (file line numbers).
+    # Unquoted lines are split with vectorized kernels; lines containing quotes go through the csv module.
+    # Returns (rows, raw, bad): raw holds every line by position, bad maps rejected line numbers
+    # to the structural problem (invalid UTF-8, wrong number of fields, unbalanced quotes).
+    # Quoted fields may not span lines: a line with an odd number of quotes (an unclosed
+    # quote, or one half of a multi-line field) is rejected rather than parsed partially.
+    import numpy as np
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    text, invalid = _to_arrow(lines)
+    raw = pc.utf8_rtrim(text, characters='\r\n')
+    numbers = pa.array(np.arange(first_line, first_line + len(lines), dtype=np.int64))
+    bad = {first_line + i: 'invalid UTF-8' for i in invalid}
+    if invalid:
+        raw = pa.array([invalid.get(i, line) for i, line in enumerate(raw.to_pylist())], pa.string())
+
+    nonblank = pc.not_equal(pc.utf8_trim_whitespace(text), '')  # Blank lines (and invalid ones) are skipped
+    quoted = pc.match_substring(raw, '"')
+    plain = pc.and_(nonblank, pc.invert(quoted))
+    field_counts = pc.add(pc.count_substring(raw, ','), 1)
+    plain_ok = pc.and_(plain, pc.equal(field_counts, len(header)))
+    wrong = pc.and_(plain, pc.not_equal(field_counts, len(header)))
+    for line_no, count in zip(numbers.filter(wrong).to_pylist(), field_counts.filter(wrong).to_pylist()):
+        bad[line_no] = f'expected {len(header)} fields, got {count}'
+
+    # Every plain_ok line has exactly len(header) fields, so column i is every len(header)-th value
+    values = pc.split_pattern(raw.filter(plain_ok), ',').flatten()
+    columns = {'line': numbers.filter(plain_ok)}
+    for i, name in enumerate(header):
+        columns[name] = values.take(np.arange(i, len(values), len(header)))
+    tables = [pa.table(columns)]
+
+    quoted_rows = []
+    has_quotes = pc.and_(nonblank, quoted)
+    for line_no, line in zip(numbers.filter(has_quotes).to_pylist(), raw.filter(has_quotes).to_pylist()):
+        if line.count('"') % 2:
+            bad[line_no] = 'unbalanced quotes (quoted fields cannot contain line breaks)'
+            continue
+        fields = next(csv.reader([line]), [])
+        if len(fields) == len(header):
+            quoted_rows.append([line_no] + fields)
+        else:
+            bad[line_no] = f'expected {len(header)} fields, got {len(fields)}'
+    if quoted_rows:
+        arrays = [pa.array(values, pa.int64() if i == 0 else pa.string()) for i, values in enumerate(zip(*quoted_rows))]
+        tables.append(pa.Table.from_arrays(arrays, names=['line'] + header))
+        return pa.concat_tables(tables).sort_by('line'), raw, bad
+    return tables[0], raw, bad
+
+
+def _parse_timestamp(value):
+    # Per-row fallback for timestamps that are not ISO 8601 (e.g. '07/12/2022 16:42').
+    # Ambiguous dates are read month-first and naive times as UTC, like the PostgreSQL COPY defaults.
+    # Returns None if the value cannot be parsed.
+    from dateutil import parser
+    try:
+        parsed = parser.parse(value)
+    except (ValueError, OverflowError):
+        return None
+    return parsed if parsed.tzinfo is not None else parsed.replace(tzinfo=timezone.utc)
+
+
+def _parse_timestamps(values):
+    # Parse a string array into a pyarrow timestamp array (UTC); unparseable values become null.
+    import pandas as pd
+    import pyarrow as pa
+    raw = pd.Series(values.to_numpy(zero_copy_only=False), dtype=object)
+    timestamp = pd.to_datetime(raw, errors='coerce', utc=True, format='ISO8601')
+    fallback = raw.notna() & timestamp.isna()
+    if fallback.any():
+        parsed = raw[fallback].map(_parse_timestamp)
+        timestamp[fallback] = pd.to_datetime(parsed, errors='coerce', utc=True)
+    return pa.array(timestamp, pa.timestamp('us', tz='UTC'))
+
+
+def validate_batch(rows, vehicle_id):
+    # Validate a batch of string rows (a table from split_lines) with vectorized checks.
+    # Returns (valid, rejected): valid rows shaped for COPY, and (line, reason) for each rejected row.
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    checks = []
+
+    def reject(mask, message):
+        checks.append(pc.if_else(pc.fill_null(mask, False), message + '; ', ''))
+
+    timestamp_raw = _missing_to_null(rows['timestamp'])
+    timestamp = _parse_timestamps(timestamp_raw)
+    reject(pc.is_null(timestamp_raw), 'missing timestamp')
+    reject(pc.and_(pc.is_valid(timestamp_raw), pc.is_null(timestamp)), 'invalid timestamp')
+    # Formatting tz-naive values is a fast path; the values are already UTC
+    timestamp_text = pc.binary_join_element_wise(
+        pc.cast(timestamp.cast(pa.timestamp('us')), pa.string()), '+00:00', '',
+    )
+
+    valid = {'timestamp': timestamp_text}
+    for column, required in NUMERIC_COLUMNS:
+        values = _missing_to_null(rows[column])
+        numeric = pc.match_substring_regex(values, NUMBER_PATTERN)
+        numbers = pc.cast(pc.if_else(numeric, values, pa.scalar(None, pa.string())), pa.float64())
+        if required:
+            reject(pc.is_null(values), f'missing {column}')
+        reject(pc.and_(pc.is_valid(values), pc.invert(pc.fill_null(pc.is_finite(numbers), False))), f'non-numeric {column}')
+        if column == 'soc':
+            reject(pc.greater(pc.abs(numbers), SOC_MAX), 'soc out of range')
+        valid[column] = values
+
+    shift_state = _missing_to_null(rows['shift_state'])
+    reject(pc.greater(pc.utf8_length(shift_state), SHIFT_STATE_MAX_LENGTH), f'shift_state longer than {SHIFT_STATE_MAX_LENGTH} characters')
+    valid['shift_state'] = shift_state
+    valid['vehicle_id'] = pa.repeat(pa.scalar(vehicle_id, pa.string()), rows.num_rows)
+
+    reasons = pc.binary_join_element_wise(*checks, '')
+    ok = pc.equal(reasons, '')
+    valid = pa.table({column: valid[column] for column in COPY_COLUMNS}).filter(ok)
+    failed = pc.invert(ok)
+    rejected = pa.table({
+        'line': rows['line'].filter(failed),
+        'reason': pc.utf8_rtrim(reasons.filter(failed), characters='; '),
+    })
+    return valid, rejected
+
+
+def to_csv_bytes(table, header=False):
+    # Serialize a pyarrow table as CSV. Nulls are written as empty unquoted fields,
+    # which COPY ... WITH (FORMAT CSV) reads as NULL.
+    import pyarrow as pa
+    import pyarrow.csv as pa_csv
+    sink = pa.BufferOutputStream()
+    pa_csv.write_csv(table, sink, pa_csv.WriteOptions(include_header=header, quoting_style='needed'))
+    return sink.getvalue().to_pybytes()
+
+
+def open_csv_text(stream):
+    # Wrap a binary stream of CSV bytes for iter_validated_batches. surrogateescape keeps invalid
+    # UTF-8 detectable, so those lines are rejected instead of being accepted with replacement
+    # characters.
+    import io
+    return io.TextIOWrapper(stream, encoding='utf-8-sig', errors='surrogateescape', newline='')
+
+
+def iter_validated_batches(source, vehicle_id, batch_size=DEFAULT_BATCH_SIZE):
+    # Read CSV lines in batches and yield (valid, rejects) pyarrow tables.
+    # source is a path or a text stream (see open_csv_text); a stream is read as it arrives
+    # and is left open.
+    # valid is ready for COPY in COPY_COLUMNS order; rejects has REJECT_COLUMNS.
+    # Raises MissingColumnsError if the header lacks a required column.
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    if isinstance(source, (str, os.PathLike)):
+        opened = open_csv_text(open(source, 'rb'))
+    else:
+        opened = contextlib.nullcontext(source)
+    with opened as f:
+        header = [name.strip() for name in next(csv.reader([f.readline()]), [])]
+        missing = set(REQUIRED_COLUMNS) - set(header)
+        if missing:
+            raise MissingColumnsError(f"CSV header missing required columns: {', '.join(sorted(missing))}.")
+        line_no = 2
+        while True:
+            lines = list(islice(f, batch_size))
+            if not lines:
+                break
+            rows, raw, bad = split_lines(lines, header, line_no)
+            valid, rejected = validate_batch(rows, vehicle_id)
+            if bad:
+                structural = pa.table({
+                    'line': pa.array(list(bad), pa.int64()),
+                    'reason': pa.array(list(bad.values()), pa.string()),
+                })
+                rejected = pa.concat_tables([rejected, structural]).sort_by('line')
+            positions = pc.subtract(rejected['line'], line_no)
+            rejects = rejected.append_column('raw', raw.take(positions))
+            yield valid, rejects
+            line_no += len(lines)
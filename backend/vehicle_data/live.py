@@ -0,0 +1,140 @@
+import json
+import logging
+import os
+import queue
+import select
+import threading
+import time
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connections
+
+logger = logging.getLogger(__name__)
+
+# PostgreSQL channel used to announce committed ingests (finalize uploads and single creates).
+CHANNEL = 'vehicle_data_ingest'
+SUBSCRIBER_QUEUE_SIZE = 100  # Events buffered per slow client before the oldest are dropped
+POLL_SECONDS = 5  # How often the listener wakes up to check for shutdown
+RECONNECT_SECONDS = 2
+
+
+def notify_ingest(cursor, payload):
+    # Publish an ingest event on CHANNEL. Inside a transaction, PostgreSQL delivers it on commit.
+    # No-op on other databases (e.g. SQLite in tests).
+    if cursor.db.vendor != 'postgresql':
+        return
+    cursor.execute('SELECT pg_notify(%s, %s)', [CHANNEL, json.dumps(payload, cls=DjangoJSONEncoder)])
+
+
+class TooManySubscribers(Exception):
+    # Raised by subscribe() when the process already serves LIVE_MAX_STREAMS streams.
+    pass
+
+
+# Subscription: One SSE client's queue of pending events, filtered by vehicle IDs.
+# An empty vehicle_ids set subscribes to the whole fleet.
+class Subscription:
+    def __init__(self, vehicle_ids=None):
+        self.vehicle_ids = set(vehicle_ids or [])
+        self.queue = queue.Queue(maxsize=SUBSCRIBER_QUEUE_SIZE)
+
+    def matches(self, payload):
+        return not self.vehicle_ids or payload.get('vehicle_id') in self.vehicle_ids
+
+    def put(self, payload):
+        # Never block the listener: drop the oldest event for clients that fall behind.
+        while True:
+            try:
+                self.queue.put_nowait(payload)
+                return
+            except queue.Full:
+                try:
+                    self.queue.get_nowait()
+                except queue.Empty:
+                    pass
+
+    def get(self, timeout):
+        return self.queue.get(timeout=timeout)
+
+
+# IngestListener: One LISTEN connection per process, shared by every subscriber.
+# The background thread starts with the first subscriber and stops after the last one leaves.
+class IngestListener:
+    def __init__(self, alias='default'):
+        self.alias = alias
+        self.lock = threading.Lock()
+        self.subscriptions = set()
+        self.thread = None
+        self.pid = None
+        self.listening = threading.Event()  # Set while the LISTEN connection is up
+
+    def subscribe(self, vehicle_ids=None):
+        # Each subscriber holds a worker thread for as long as it streams, so at most
+        # settings.LIVE_MAX_STREAMS are admitted; beyond that TooManySubscribers is raised.
+        subscription = Subscription(vehicle_ids)
+        with self.lock:
+            if len(self.subscriptions) >= settings.LIVE_MAX_STREAMS:
+                raise TooManySubscribers(f'{len(self.subscriptions)} live streams already open.')
+            self.subscriptions.add(subscription)
+            # Threads do not survive fork(): start a new one in each worker process.
+            if self.thread is None or not self.thread.is_alive() or self.pid != os.getpid():
+                self.pid = os.getpid()
+                self.thread = threading.Thread(target=self.run, name='vehicle-data-listener', daemon=True)
+                self.thread.start()
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self.lock:
+            self.subscriptions.discard(subscription)
+
+    def dispatch(self, payload):
+        with self.lock:
+            subscriptions = list(self.subscriptions)
+        for subscription in subscriptions:
+            if subscription.matches(payload):
+                subscription.put(payload)
+
+    def has_subscribers(self):
+        with self.lock:
+            return bool(self.subscriptions)
+
+    def keep_running(self):
+        # Checked under the lock so a concurrent subscribe() never sees a thread that is about to exit.
+        with self.lock:
+            if self.subscriptions:
+                return True
+            self.thread = None
+            return False
+
+    def run(self):
+        while self.keep_running():
+            wrapper = connections.create_connection(self.alias)
+            try:
+                wrapper.ensure_connection()
+                wrapper.set_autocommit(True)
+                conn = wrapper.connection
+                with conn.cursor() as cur:
+                    cur.execute(f'LISTEN {CHANNEL}')
+                self.listening.set()
+                logger.info(f"Listening for ingest events on '{CHANNEL}'.")
+                while self.has_subscribers():
+                    if select.select([conn], [], [], POLL_SECONDS) == ([], [], []):
+                        continue
+                    conn.poll()
+                    while conn.notifies:
+                        notify = conn.notifies.pop(0)
+                        try:
+                            self.dispatch(json.loads(notify.payload))
+                        except ValueError:
+                            logger.warning(f"Ignoring malformed ingest event: {notify.payload!r}")
+            except Exception as e:
+                logger.exception(f"Ingest listener error, reconnecting: {e}")
+                time.sleep(RECONNECT_SECONDS)
+            finally:
+                self.listening.clear()
+                wrapper.close()
+        logger.info("Ingest listener stopped (no subscribers).")
+
+
+listener = IngestListener()
@@ -0,0 +1,69 @@
+from array import array
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models.functions import TruncMonth
+from django.utils import timezone
+
+from vehicle_data.archive import FIELDS, write_partition
+from vehicle_data.models import VehicleData
+
+DELETE_BATCH_SIZE = 10_000
+READ_CHUNK_SIZE = 10_000  # Rows fetched per database round trip while archiving
+
+
+# archive_vehicle_data: Move telemetry older than --older-than-days out of PostgreSQL
+# into per-vehicle, per-month Parquet files and record them in the archive manifest.
+# Each partition is written before its rows are deleted, so an interrupted run can
+# simply be re-run: partitions are merged and de-duplicated on timestamp.
+class Command(BaseCommand):
+    help = 'Archive vehicle data older than a given age to per-vehicle, per-month Parquet files.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--older-than-days', type=int, default=settings.ARCHIVE_AFTER_DAYS,
+            help=f'Archive rows with a timestamp older than this many days (default: {settings.ARCHIVE_AFTER_DAYS}).',
+        )
+        parser.add_argument('--dry-run', action='store_true', help='Only report what would be archived.')
+
+    def handle(self, *args, **options):
+        cutoff = timezone.now() - timedelta(days=options['older_than_days'])
+        old_rows = VehicleData.objects.filter(timestamp__lt=cutoff)
+        partitions = (
+            old_rows.annotate(month=TruncMonth('timestamp'))
+            .values_list('vehicle_id', 'month')
+            .distinct()
+            .order_by('vehicle_id', 'month')
+        )
+        self.stdout.write(f'Archiving vehicle data older than {cutoff.isoformat()}')
+        total = 0
+        for vehicle_id, month_start in partitions:
+            month_end = (month_start + timedelta(days=32)).replace(day=1)
+            rows = (
+                old_rows.filter(vehicle_id=vehicle_id, timestamp__gte=month_start, timestamp__lt=month_end)
+                .order_by('timestamp')
+            )
+            month = month_start.strftime('%Y-%m')
+            if options['dry_run']:
+                self.stdout.write(f'  {vehicle_id} {month}: {rows.count()} rows (dry run)')
+                continue
+            # Stream rows into the Parquet writer; only their ids are kept, for the delete
+            ids = array('q')
+            stream = self.collect_ids(rows.values(*FIELDS).iterator(chunk_size=READ_CHUNK_SIZE), ids)
+            entry = write_partition(vehicle_id, month, stream)
+            if entry is None:
+                continue
+            with transaction.atomic():
+                for i in range(0, len(ids), DELETE_BATCH_SIZE):
+                    VehicleData.objects.filter(id__in=ids[i:i + DELETE_BATCH_SIZE].tolist()).delete()
+            total += len(ids)
+            self.stdout.write(f"  {vehicle_id} {month}: archived {len(ids)} rows to {entry['path']}")
+        self.stdout.write(self.style.SUCCESS(f'Archived {total} rows.'))
+
+    def collect_ids(self, rows, ids):
+        # Pass rows through to the writer, recording each id as it goes by.
+        for row in rows:
+            ids.append(row['id'])
+            yield row
@@ -1,8 +1,18 @@
 from rest_framework import serializers
+from .archive import is_archived
 from .models import VehicleData
 
 # Serializer for VehicleData model. Serializes all fields for API input/output.
+# (vehicle_id, timestamp) must also be unique against the Parquet archive, not just the live table.
 class VehicleDataSerializer(serializers.ModelSerializer):
     class Meta:
         model = VehicleData
-        fields = '__all__' 
\ No newline at end of file
+        fields = '__all__'
+
+    def validate(self, attrs):
+        attrs = super().validate(attrs)
+        if self.instance is None and is_archived(attrs['vehicle_id'], attrs['timestamp']):
+            raise serializers.ValidationError(
+                'The fields vehicle_id, timestamp must make a unique set.', code='unique',
+            )
+        return attrs
@@ -0,0 +1,179 @@
+# Tests for tiered storage: archiving old rows to Parquet and merging them back into list and export reads.
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.core.files.uploadedfile import SimpleUploadedFile
+from rest_framework.test import APIClient
+from django.urls import reverse
+from django.utils import timezone
+from unittest import mock
+from . import archive
+from .archive import count_archived, load_manifest, read_archived, write_partition
+from .models import VehicleData
+import datetime
+import io
+import shutil
+import tempfile
+
+class VehicleDataArchiveTest(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.archive_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.archive_root)
+        override = override_settings(ARCHIVE_ROOT=self.archive_root)
+        override.enable()
+        self.addCleanup(override.disable)
+        self.now = timezone.now()
+        for days in (400, 200, 1):
+            VehicleData.objects.create(
+                vehicle_id='veh1', timestamp=self.now - datetime.timedelta(days=days),
+                odometer=1000 - days, soc=50, elevation=5,
+            )
+        VehicleData.objects.create(
+            vehicle_id='veh2', timestamp=self.now - datetime.timedelta(days=300),
+            odometer=1, soc=50, elevation=5, speed=10, shift_state='D',
+        )
+
+    def archive(self, days=90):
+        call_command('archive_vehicle_data', older_than_days=days, stdout=io.StringIO())
+
+    def test_archive_moves_old_rows_to_parquet(self):
+        self.archive()
+        self.assertEqual(VehicleData.objects.count(), 1)
+        manifest = load_manifest()
+        self.assertEqual(len(manifest), 3)
+        self.assertEqual(sum(entry['rows'] for entry in manifest), 3)
+        rows = read_archived('veh2')
+        self.assertEqual(len(rows), 1)
+        self.assertEqual(rows[0]['shift_state'], 'D')
+        self.assertEqual(rows[0]['speed'], 10)
+
+    def test_archive_is_idempotent(self):
+        self.archive()
+        VehicleData.objects.create(
+            vehicle_id='veh2', timestamp=self.now - datetime.timedelta(days=300),
+            odometer=2, soc=50, elevation=5,
+        )
+        self.archive()
+        self.assertEqual(sum(entry['rows'] for entry in load_manifest()), 3)
+        self.assertEqual(read_archived('veh2')[0]['odometer'], 2)
+
+    def test_archive_streams_in_row_groups(self):
+        for minute in range(25):
+            VehicleData.objects.create(
+                vehicle_id='veh2', timestamp=self.now - datetime.timedelta(days=300, minutes=minute + 1),
+                odometer=minute, soc=50, elevation=5,
+            )
+        with mock.patch.object(archive, 'ROW_GROUP_SIZE', 10):
+            self.archive()
+        entry = next(entry for entry in load_manifest() if entry['vehicle_id'] == 'veh2')
+        self.assertEqual(entry['rows'], 26)
+        self.assertEqual([rows for _, _, rows in archive.row_groups(entry)], [10, 10, 6])
+        timestamps = [row['timestamp'] for row in read_archived('veh2')]
+        self.assertEqual(timestamps, sorted(timestamps))
+        self.assertFalse(VehicleData.objects.filter(vehicle_id='veh2').exists())
+
+    def test_partition_path_stays_under_archive_root(self):
+        self.assertEqual(archive.partition_path('..', '2021-01'), '%2E%2E/2021-01.parquet')
+        self.assertEqual(archive.partition_path('.', '2021-01'), '%2E/2021-01.parquet')
+        self.assertEqual(archive.partition_path('a/../b', '2021-01'), 'a%2F..%2Fb/2021-01.parquet')
+        with self.assertRaises(ValueError):
+            archive.partition_path('veh1', '../../2021-01')
+
+    def test_list_merges_archived_rows(self):
+        self.archive()
+        url = reverse('vehicle_data_list_create')
+        response = self.client.get(url, {'vehicle_id': 'veh1', 'ordering': '-timestamp', 'page_size': 2})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['count'], 3)
+        self.assertEqual([item['odometer'] for item in response.data['results']], [999, 800])
+        response = self.client.get(url, {'vehicle_id': 'veh1', 'ordering': '-timestamp', 'page_size': 2, 'page': 2})
+        self.assertEqual([item['odometer'] for item in response.data['results']], [600])
+        self.assertEqual(set(response.data['vehicleIDs']), {'veh1', 'veh2'})
+
+    def test_list_prunes_archive_by_timestamp(self):
+        self.archive()
+        url = reverse('vehicle_data_list_create')
+        start = self.now - datetime.timedelta(days=250)
+        response = self.client.get(url, {'vehicle_id': 'veh1', 'initial_timestamp': start.isoformat()})
+        self.assertEqual(response.data['count'], 2)
+
+    def test_export_includes_archived_rows(self):
+        self.archive()
+        url = reverse('vehicle_data_export')
+        response = self.client.get(url, {'vehicle_id': 'veh1', 'export': 'csv'})
+        lines = b''.join(response.streaming_content).decode().splitlines()
+        self.assertEqual(len(lines), 4)
+
+    def write_many(self, vehicle_id, month_start, count):
+        """Helper to archive `count` one-minute readings starting at month_start, in tiny row groups."""
+        rows = [
+            dict(id=None, vehicle_id=vehicle_id, timestamp=month_start + datetime.timedelta(minutes=i),
+                 speed=None, odometer=i, soc=50, elevation=5, shift_state=None)
+            for i in range(count)
+        ]
+        with mock.patch.object(archive, 'ROW_GROUP_SIZE', 10):
+            write_partition(vehicle_id, month_start.strftime('%Y-%m'), rows)
+
+    def test_count_uses_row_group_statistics(self):
+        month = datetime.datetime(2021, 3, 1, tzinfo=datetime.timezone.utc)
+        self.write_many('veh3', month, 95)
+        self.assertEqual(count_archived('veh3'), 95)
+        start, end = month + datetime.timedelta(minutes=15), month + datetime.timedelta(minutes=64)
+        self.assertEqual(count_archived('veh3', start, end), 50)
+        self.assertEqual(count_archived('veh3', end=month - datetime.timedelta(minutes=1)), 0)
+
+    def test_first_page_reads_only_needed_partitions(self):
+        for month in range(1, 13):
+            self.write_many('veh3', datetime.datetime(2021, month, 1, tzinfo=datetime.timezone.utc), 30)
+        url = reverse('vehicle_data_list_create')
+        with mock.patch.object(archive, 'iter_partition', wraps=archive.iter_partition) as iter_partition:
+            response = self.client.get(url, {'vehicle_id': 'veh3', 'ordering': '-timestamp', 'page_size': 5})
+        self.assertEqual(response.data['count'], 360)
+        self.assertEqual([item['odometer'] for item in response.data['results']], [29, 28, 27, 26, 25])
+        self.assertEqual(iter_partition.call_count, 1)
+
+    def test_pages_merge_partitions_in_timestamp_order(self):
+        self.write_many('veh3', datetime.datetime(2021, 1, 1, tzinfo=datetime.timezone.utc), 25)
+        self.write_many('veh4', datetime.datetime(2021, 1, 1, 0, 0, 30, tzinfo=datetime.timezone.utc), 25)
+        url = reverse('vehicle_data_list_create')
+        start = datetime.datetime(2021, 1, 1, 0, 5, tzinfo=datetime.timezone.utc)
+        response = self.client.get(url, {'initial_timestamp': start.isoformat(), 'page_size': 4, 'page': 2})
+        self.assertEqual(response.data['count'], 40 + 4)  # 20 + 20 archived after start, plus the live rows
+        self.assertEqual(
+            [(item['vehicle_id'], item['odometer']) for item in response.data['results']],
+            [('veh3', 7), ('veh4', 7), ('veh3', 8), ('veh4', 8)],
+        )
+
+    def test_create_rejects_archived_timestamp(self):
+        self.archive()
+        url = reverse('vehicle_data_list_create')
+        timestamp = self.now - datetime.timedelta(days=300)
+        response = self.client.post(url, {
+            'vehicle_id': 'veh2', 'timestamp': timestamp.isoformat(), 'odometer': 2, 'soc': 50, 'elevation': 5,
+        }, format='json')
+        self.assertEqual(response.status_code, 400)
+        response = self.client.get(url, {'vehicle_id': 'veh2'})
+        self.assertEqual(response.data['count'], 1)
+
+    def test_upload_skips_archived_timestamps(self):
+        if connection.vendor != 'postgresql':
+            self.skipTest('finalize uses PostgreSQL COPY')
+        self.archive()
+        timestamp = (self.now - datetime.timedelta(days=300)).isoformat()
+        body = (
+            'timestamp,speed,odometer,soc,elevation,shift_state\n'
+            f'{timestamp},NULL,2,50,5,NULL\n'
+            f'{self.now.isoformat()},NULL,3,50,5,NULL\n'
+        ).encode()
+        with tempfile.TemporaryDirectory() as media_root, override_settings(MEDIA_ROOT=media_root):
+            self.client.post(reverse('vehicle_data_upload_chunk'), {
+                'chunk': SimpleUploadedFile('chunk', body), 'file_name': 'f.csv', 'chunk_index': 0,
+            }, format='multipart')
+            response = self.client.post(reverse('vehicle_data_finalize_upload'), {
+                'file_name': 'f.csv', 'total_chunks': 1, 'vehicle_id': 'veh2',
+            }, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual((response.data['inserted'], response.data['deduplicated']), (1, 1))
+        response = self.client.get(reverse('vehicle_data_list_create'), {'vehicle_id': 'veh2'})
+        self.assertEqual(response.data['count'], 2)
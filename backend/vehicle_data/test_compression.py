@@ -0,0 +1,122 @@
+# Unit tests for compression helpers: incremental chunk decompression, streaming compression, and Accept-Encoding negotiation.
+from django.test import SimpleTestCase
+from .compression import DecompressionError, compress_stream, decompress_chunks, open_upload, negotiate_encoding, sniff_encoding, zstandard, brotli
+import gzip
+import io
+import os
+import shutil
+import tempfile
+
+CSV_DATA = b'timestamp,speed,odometer,soc,elevation,shift_state\n' + b'2022-07-12 16:42:25.435,NULL,40800.6,58,92,NULL\n' * 500
+
+class CompressionTest(SimpleTestCase):
+    def write_chunks(self, payload, chunk_size=100):
+        """Helper to split a payload into chunk files like the upload view does."""
+        temp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, temp_dir)
+        paths = []
+        for i in range(0, len(payload), chunk_size):
+            path = os.path.join(temp_dir, f'part_{i}')
+            with open(path, 'wb') as f:
+                f.write(payload[i:i + chunk_size])
+            paths.append(path)
+        return paths
+
+    def test_decompress_gzip_chunks(self):
+        paths = self.write_chunks(gzip.compress(CSV_DATA))
+        out = io.BytesIO()
+        decompress_chunks(paths, out, 'gzip', read_size=37)
+        self.assertEqual(out.getvalue(), CSV_DATA)
+
+    def test_decompress_sniffs_encoding(self):
+        self.assertEqual(sniff_encoding(gzip.compress(b'x')), 'gzip')
+        self.assertEqual(sniff_encoding(CSV_DATA), 'identity')
+        paths = self.write_chunks(gzip.compress(CSV_DATA))
+        out = io.BytesIO()
+        decompress_chunks(paths, out)
+        self.assertEqual(out.getvalue(), CSV_DATA)
+
+    def test_decompress_identity_chunks(self):
+        out = io.BytesIO()
+        decompress_chunks(self.write_chunks(CSV_DATA), out)
+        self.assertEqual(out.getvalue(), CSV_DATA)
+
+    def test_decompress_truncated_gzip_raises(self):
+        payload = gzip.compress(CSV_DATA)
+        paths = self.write_chunks(payload[:len(payload) // 2])
+        with self.assertRaises(ValueError):
+            decompress_chunks(paths, io.BytesIO(), 'gzip')
+
+    def test_decompress_multi_member_gzip(self):
+        paths = self.write_chunks(gzip.compress(b'a\n') + gzip.compress(b'b\n'), chunk_size=7)
+        out = io.BytesIO()
+        decompress_chunks(paths, out)
+        self.assertEqual(out.getvalue(), b'a\nb\n')
+
+    def test_decompress_gzip_trailing_garbage_raises(self):
+        paths = self.write_chunks(gzip.compress(CSV_DATA) + b'garbage!')
+        with self.assertRaises(ValueError):
+            decompress_chunks(paths, io.BytesIO(), 'gzip')
+
+    def test_decompress_caps_output_size(self):
+        # A small gzip "bomb": 50 MB of zeros compresses to ~50 KB.
+        paths = self.write_chunks(gzip.compress(b'\0' * 50 * 1024 * 1024), chunk_size=1024 * 1024)
+        out = io.BytesIO()
+        with self.assertRaises(ValueError):
+            decompress_chunks(paths, out, 'gzip', read_size=64 * 1024, max_size=1024 * 1024)
+        self.assertLessEqual(len(out.getvalue()), 1024 * 1024)
+
+    def test_open_upload_streams_lines(self):
+        paths = self.write_chunks(gzip.compress(CSV_DATA), chunk_size=53)
+        with open_upload(paths, read_size=64) as stream:
+            self.assertEqual(stream.readline(), CSV_DATA.split(b'\n')[0] + b'\n')
+            self.assertEqual(stream.readline() + stream.read(), CSV_DATA[CSV_DATA.index(b'\n') + 1:])
+
+    def test_open_upload_raises_while_reading(self):
+        paths = self.write_chunks(gzip.compress(b'\0' * 2 * 1024 * 1024), chunk_size=1024)
+        with open_upload(paths, 'gzip', max_size=1024 * 1024) as stream:
+            with self.assertRaises(DecompressionError):
+                while stream.read(64 * 1024):
+                    pass
+
+    def test_decompress_zstd_chunks(self):
+        if zstandard is None:
+            self.skipTest('zstandard not installed')
+        paths = self.write_chunks(zstandard.ZstdCompressor().compress(CSV_DATA))
+        out = io.BytesIO()
+        decompress_chunks(paths, out)
+        self.assertEqual(out.getvalue(), CSV_DATA)
+
+    def test_decompress_multi_frame_zstd(self):
+        if zstandard is None:
+            self.skipTest('zstandard not installed')
+        compressor = zstandard.ZstdCompressor(write_checksum=True)
+        paths = self.write_chunks(compressor.compress(CSV_DATA) + compressor.compress(b'tail\n'))
+        out = io.BytesIO()
+        decompress_chunks(paths, out, 'zstd', read_size=100)
+        self.assertEqual(out.getvalue(), CSV_DATA + b'tail\n')
+
+    def test_decompress_truncated_or_padded_zstd_raises(self):
+        if zstandard is None:
+            self.skipTest('zstandard not installed')
+        payload = zstandard.ZstdCompressor().compress(os.urandom(300000))
+        for bad in (payload[:len(payload) // 2], payload[:-2], payload + b'garbage!'):
+            with self.assertRaises(ValueError):
+                decompress_chunks(self.write_chunks(bad, chunk_size=4096), io.BytesIO(), 'zstd')
+
+    def test_compress_stream_round_trip(self):
+        rows = [line.decode() + '\n' for line in CSV_DATA.splitlines()]
+        compressed = b''.join(compress_stream(rows, 'gzip', min_flush_size=128))
+        self.assertEqual(gzip.decompress(compressed), CSV_DATA)
+        if brotli is not None:
+            compressed = b''.join(compress_stream(rows, 'br'))
+            self.assertEqual(brotli.decompress(compressed), CSV_DATA)
+
+    def test_negotiate_encoding(self):
+        self.assertIsNone(negotiate_encoding(''))
+        self.assertIsNone(negotiate_encoding('identity'))
+        self.assertEqual(negotiate_encoding('gzip, deflate'), 'gzip')
+        self.assertIsNone(negotiate_encoding('gzip;q=0'))
+        self.assertEqual(negotiate_encoding('gzip;q=1.0, br;q=0.5'), 'gzip')
+        if brotli is not None:
+            self.assertEqual(negotiate_encoding('gzip, br'), 'br')
@@ -0,0 +1,124 @@
+# Unit tests for the ingest validation stage: vectorized row checks, line numbers, and reject reasons.
+from django.test import SimpleTestCase, override_settings
+from .ingest import (
+    COPY_COLUMNS, REJECT_COLUMNS, MissingColumnsError, iter_validated_batches, prune_reject_files, reject_file_path,
+)
+import os
+import tempfile
+import time
+
+HEADER = 'timestamp,speed,odometer,soc,elevation,shift_state\n'
+
+class IngestValidationTest(SimpleTestCase):
+    def write_csv(self, body, header=HEADER):
+        """Helper to write a CSV file and return its path."""
+        fd, path = tempfile.mkstemp(suffix='.csv')
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            f.write(header + body)
+        self.addCleanup(os.remove, path)
+        return path
+
+    def validate(self, path, batch_size=1000):
+        """Helper to run all batches and concatenate the valid and rejected rows."""
+        valid, rejects = [], []
+        for v, r in iter_validated_batches(path, 'veh1', batch_size=batch_size):
+            valid.extend(list(row.values()) for row in v.to_pylist())
+            rejects.extend(list(row.values()) for row in r.to_pylist())
+        return valid, rejects
+
+    def test_valid_rows_are_accepted(self):
+        path = self.write_csv(
+            '2022-07-12 16:42:25.435,NULL,40800.6,58,92,NULL\n'
+            '2022-07-12T16:42:38Z,12.5,40801,57,93,D\n'
+        )
+        valid, rejects = self.validate(path)
+        self.assertEqual(rejects, [])
+        self.assertEqual(len(valid), 2)
+        self.assertEqual(valid[0][0], '2022-07-12 16:42:25.435000+00:00')
+        self.assertEqual(valid[1][COPY_COLUMNS.index('shift_state')], 'D')
+        self.assertTrue(all(row[-1] == 'veh1' for row in valid))
+
+    def test_bad_rows_are_rejected_with_line_numbers(self):
+        path = self.write_csv(
+            '2022-07-12 16:42:25,NULL,40800.6,58,92,NULL\n'
+            'not-a-date,NULL,40800.6,58,92,NULL\n'
+            '2022-07-12 16:42:27,NULL,40800.6,abc,92,NULL\n'
+            '2022-07-12 16:42:28,NULL,NULL,58,92,NULL\n'
+            '2022-07-12 16:42:29,NULL,40800.6,58,92,NULL,extra\n'
+            '2022-07-12 16:42:30,NULL,40800.6,58,92,NULL\n'
+        )
+        valid, rejects = self.validate(path, batch_size=2)
+        self.assertEqual(len(valid), 2)
+        reasons = {line: reason for line, reason, raw in rejects}
+        self.assertEqual(reasons, {
+            3: 'invalid timestamp',
+            4: 'non-numeric soc',
+            5: 'missing odometer',
+            6: 'expected 6 fields, got 7',
+        })
+        self.assertEqual(rejects[0][REJECT_COLUMNS.index('raw')], 'not-a-date,NULL,40800.6,58,92,NULL')
+
+    def test_quoted_fields_and_blank_lines(self):
+        path = self.write_csv(
+            '"2022-07-12 16:42:25",NULL,40800.6,58,92,"D"\n'
+            '\n'
+            '2022-07-12 16:42:26,NULL,40800.6,58,92,"a very long shift state value"\n'
+        )
+        valid, rejects = self.validate(path)
+        self.assertEqual(len(valid), 1)
+        self.assertEqual(rejects[0][:2], [4, 'shift_state longer than 20 characters'])
+
+    def test_missing_columns_raise(self):
+        path = self.write_csv('2022-07-12 16:42:25,1\n', header='timestamp,speed\n')
+        with self.assertRaises(MissingColumnsError):
+            self.validate(path)
+
+    def test_multiline_and_unclosed_quotes_are_rejected(self):
+        path = self.write_csv(
+            '2022-07-12 16:42:25,NULL,40800.6,58,92,"multi\n'
+            'line"\n'
+            '2022-07-12 16:42:26,NULL,40800.6,58,92,"unclosed\n'
+            '2022-07-12 16:42:27,NULL,40800.6,58,92,"D"\n'
+        )
+        valid, rejects = self.validate(path)
+        self.assertEqual(len(valid), 1)
+        self.assertEqual(valid[0][COPY_COLUMNS.index('shift_state')], 'D')
+        self.assertEqual([line for line, reason, raw in rejects], [2, 3, 4])
+        self.assertTrue(all(reason.startswith('unbalanced quotes') for line, reason, raw in rejects))
+
+    def test_non_iso_timestamps_fall_back_to_dateutil(self):
+        path = self.write_csv(
+            '07/12/2022 16:42,NULL,40800.6,58,92,NULL\n'
+            'Jul 12 2022 4:42:30 PM +02:00,NULL,40800.6,58,92,NULL\n'
+        )
+        valid, rejects = self.validate(path)
+        self.assertEqual(rejects, [])
+        self.assertEqual([row[0] for row in valid], ['2022-07-12 16:42:00.000000+00:00', '2022-07-12 14:42:30.000000+00:00'])
+
+    def test_invalid_utf8_is_rejected(self):
+        path = self.write_csv('')
+        with open(path, 'ab') as f:
+            f.write(b'2022-07-12 16:42:25,NULL,40800.6,58,92,D\xff\n2022-07-12 16:42:26,NULL,40800.6,58,92,D\n')
+        valid, rejects = self.validate(path)
+        self.assertEqual(len(valid), 1)
+        self.assertEqual(rejects, [[2, 'invalid UTF-8', '2022-07-12 16:42:25,NULL,40800.6,58,92,D\ufffd']])
+
+    def test_values_pass_through_unchanged(self):
+        path = self.write_csv(' 2022-07-12T16:42:25+02:00 , 1e3 ,40800.60,58,92, D \n2022-07-12 16:42:26,NULL,1,2,3,NULL\n')
+        valid, rejects = self.validate(path)
+        self.assertEqual(rejects, [])
+        self.assertEqual(valid[0], ['2022-07-12 14:42:25.000000+00:00', '1e3', '40800.60', '58', '92', 'D', 'veh1'])
+        self.assertEqual(valid[1][1], None)
+        self.assertEqual(valid[1][COPY_COLUMNS.index('shift_state')], None)
+
+    def test_prune_reject_files(self):
+        with tempfile.TemporaryDirectory() as media_root, override_settings(MEDIA_ROOT=media_root):
+            old_path, new_path = reject_file_path('old'), reject_file_path('new')
+            os.makedirs(os.path.dirname(old_path))
+            for path in (old_path, new_path):
+                open(path, 'w').close()
+            week_ago = time.time() - 8 * 86400
+            os.utime(old_path, (week_ago, week_ago))
+            self.assertEqual(prune_reject_files(max_age_days=7), 1)
+            self.assertFalse(os.path.exists(old_path))
+            self.assertTrue(os.path.exists(new_path))
@@ -0,0 +1,155 @@
+# Tests for live ingest fan-out: subscription filtering, the shared listener's dispatch, SSE framing,
+# and (on PostgreSQL) the NOTIFY round trip from single creates and finalized uploads.
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection, connections, transaction
+from django.test import SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from rest_framework.test import APIClient
+from django.urls import reverse
+from unittest import mock
+from . import live
+from .live import CHANNEL, SUBSCRIBER_QUEUE_SIZE, IngestListener, Subscription, TooManySubscribers, notify_ingest
+from .views import VehicleDataStreamView
+import datetime
+import json
+import tempfile
+
+class IngestListenerTest(SimpleTestCase):
+    def setUp(self):
+        self.listener = IngestListener()
+
+    def add(self, vehicle_ids=None):
+        """Helper to register a subscription without starting the listener thread."""
+        subscription = Subscription(vehicle_ids)
+        self.listener.subscriptions.add(subscription)
+        return subscription
+
+    def test_dispatch_fans_out_by_vehicle(self):
+        veh1 = self.add(['veh1'])
+        fleet = self.add()
+        self.listener.dispatch({'vehicle_id': 'veh1', 'inserted': 3})
+        self.listener.dispatch({'vehicle_id': 'veh2', 'inserted': 1})
+        self.assertEqual(veh1.queue.qsize(), 1)
+        self.assertEqual(fleet.queue.qsize(), 2)
+        self.assertEqual(veh1.get(timeout=0)['inserted'], 3)
+
+    def test_unsubscribed_clients_get_nothing(self):
+        subscription = self.add()
+        self.listener.unsubscribe(subscription)
+        self.listener.dispatch({'vehicle_id': 'veh1'})
+        self.assertTrue(subscription.queue.empty())
+
+    def test_slow_client_drops_oldest_events(self):
+        subscription = self.add()
+        for i in range(SUBSCRIBER_QUEUE_SIZE + 5):
+            self.listener.dispatch({'vehicle_id': 'veh1', 'inserted': i})
+        self.assertEqual(subscription.queue.qsize(), SUBSCRIBER_QUEUE_SIZE)
+        self.assertEqual(subscription.get(timeout=0)['inserted'], 5)
+
+    @override_settings(LIVE_MAX_STREAMS=2)
+    def test_subscribe_caps_streams_per_process(self):
+        self.add()
+        self.add()
+        with self.assertRaises(TooManySubscribers):
+            self.listener.subscribe()
+        self.assertEqual(len(self.listener.subscriptions), 2)
+
+    def test_event_stream_frames(self):
+        subscription = Subscription()
+        subscription.put({'vehicle_id': 'veh1', 'inserted': 2})
+        stream = VehicleDataStreamView().event_stream(subscription)
+        self.assertTrue(next(stream).startswith('retry:'))
+        frame = next(stream)
+        self.assertTrue(frame.startswith('event: ingest\ndata: '))
+        self.assertEqual(json.loads(frame.split('data: ', 1)[1])['inserted'], 2)
+        stream.close()
+
+    def test_notify_ingest_payload(self):
+        cursor = mock.Mock()
+        cursor.db.vendor = 'postgresql'
+        timestamp = datetime.datetime(2022, 7, 12, 16, 42, tzinfo=datetime.timezone.utc)
+        notify_ingest(cursor, {'vehicle_id': 'veh1', 'inserted': 1, 'last_timestamp': timestamp})
+        sql, (channel, payload) = cursor.execute.call_args.args
+        self.assertIn('pg_notify', sql)
+        self.assertEqual(channel, CHANNEL)
+        self.assertEqual(json.loads(payload), {'vehicle_id': 'veh1', 'inserted': 1, 'last_timestamp': '2022-07-12T16:42:00Z'})
+
+    def test_notify_ingest_skips_other_databases(self):
+        cursor = mock.Mock()
+        cursor.db.vendor = 'sqlite'
+        notify_ingest(cursor, {'vehicle_id': 'veh1'})
+        cursor.execute.assert_not_called()
+
+class VehicleDataStreamViewTest(TestCase):
+    def test_stream_requires_postgresql(self):
+        """Should refuse to stream when the database cannot LISTEN/NOTIFY."""
+        with mock.patch.object(connections['default'], 'vendor', 'sqlite'):
+            response = APIClient().get(reverse('vehicle_data_stream'), HTTP_ACCEPT='text/event-stream')
+        self.assertEqual(response.status_code, 503)
+        self.assertIn(b'PostgreSQL', response.content)
+
+    @override_settings(LIVE_RETRY_SECONDS=7)
+    def test_stream_over_capacity_asks_client_to_retry(self):
+        """Should answer 503 with Retry-After and an SSE retry field once the process is full."""
+        with mock.patch.object(connections['default'], 'vendor', 'postgresql'), \
+                mock.patch.object(live.listener, 'subscribe', side_effect=TooManySubscribers):
+            response = APIClient().get(reverse('vehicle_data_stream'), HTTP_ACCEPT='text/event-stream')
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response['Retry-After'], '7')
+        self.assertTrue(response.content.startswith(b'retry: 7000\ndata: '))
+
+class IngestNotifyTest(TransactionTestCase):
+    # Real round trip: NOTIFY is sent on commit and picked up by a listener thread on its own connection.
+    def setUp(self):
+        if connection.vendor != 'postgresql':
+            self.skipTest('LISTEN/NOTIFY requires PostgreSQL')
+        self.client = APIClient()
+        self.listener = IngestListener()
+        patcher = mock.patch.object(live, 'POLL_SECONDS', 0.1)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def subscribe(self, vehicle_ids=None):
+        """Helper to subscribe and wait until the listener thread is LISTENing."""
+        subscription = self.listener.subscribe(vehicle_ids)
+        thread = self.listener.thread
+        self.addCleanup(thread.join, 5)
+        self.addCleanup(self.listener.unsubscribe, subscription)
+        self.assertTrue(self.listener.listening.wait(5))
+        return subscription
+
+    def test_create_is_pushed_after_commit(self):
+        subscription = self.subscribe(['veh1'])
+        with self.assertRaises(RuntimeError), transaction.atomic(), connection.cursor() as cur:
+            notify_ingest(cur, {'vehicle_id': 'veh1', 'inserted': 99})
+            raise RuntimeError('rolled back: never delivered')
+        response = self.client.post(reverse('vehicle_data_list_create'), {
+            'vehicle_id': 'veh1', 'timestamp': '2022-07-12T16:42:25Z', 'odometer': 200, 'soc': 80, 'elevation': 15,
+        }, format='json')
+        self.assertEqual(response.status_code, 201)
+        payload = subscription.get(timeout=5)
+        self.assertEqual(payload['inserted'], 1)
+        self.assertEqual(payload['latest']['odometer'], 200)
+        self.assertTrue(subscription.queue.empty())
+
+    def test_finalize_pushes_aggregates(self):
+        subscription = self.subscribe(['veh1'])
+        body = (
+            b'timestamp,speed,odometer,soc,elevation,shift_state\n'
+            b'2022-07-12 16:42:25,10,40800.6,58,92,D\n'
+            b'2022-07-12 16:42:26,30,40800.7,57,92,D\n'
+            b'2022-07-12 16:42:27,20,40800.8,55,93,D\n'
+        )
+        with tempfile.TemporaryDirectory() as media_root, override_settings(MEDIA_ROOT=media_root):
+            self.client.post(reverse('vehicle_data_upload_chunk'), {
+                'chunk': SimpleUploadedFile('chunk', body), 'file_name': 'f.csv', 'chunk_index': 0,
+            }, format='multipart')
+            response = self.client.post(reverse('vehicle_data_finalize_upload'), {
+                'file_name': 'f.csv', 'total_chunks': 1, 'vehicle_id': 'veh1',
+            }, format='json')
+        self.assertEqual(response.data['inserted'], 3)
+        payload = subscription.get(timeout=5)
+        self.assertEqual(payload['inserted'], 3)
+        self.assertEqual((payload['first_timestamp'], payload['last_timestamp']), ('2022-07-12T16:42:25Z', '2022-07-12T16:42:27Z'))
+        self.assertEqual((payload['avg_speed'], payload['max_speed']), (20, 30))
+        self.assertEqual((payload['min_soc'], payload['max_soc']), (55, 58))
+        self.assertEqual(payload['latest']['odometer'], 40800.8)
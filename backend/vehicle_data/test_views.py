@@ -1,10 +1,17 @@
 # API tests for vehicle data endpoints: list, create, filtering, ordering, pagination, and chunked upload.
-from django.test import TestCase
+from django.db import connection
+from django.test import TestCase, override_settings
 from rest_framework.test import APIClient
 from django.urls import reverse
 from django.utils import timezone, dateparse
+from django.core.files.uploadedfile import SimpleUploadedFile
 from .models import VehicleData
+import csv
 import datetime
+import gzip
+import json
+import os
+import tempfile
 
 class VehicleDataAPITest(TestCase):
     def setUp(self):
@@ -108,4 +115,105 @@ class VehicleDataAPITest(TestCase):
         }
         response = self.client.post(url, data, format='json')
         self.assertIn(response.status_code, (200, 201))
-        self.assertTrue(VehicleData.objects.filter(odometer=200).exists()) 
\ No newline at end of file
+        self.assertTrue(VehicleData.objects.filter(odometer=200).exists())
+
+    def test_vehicle_data_export_csv_streams(self):
+        """Should stream a CSV export with a header and one line per record."""
+        self.create_vehicle_data(vehicle_id='veh1', odometer=1)
+        self.create_vehicle_data(vehicle_id='veh1', odometer=2, timestamp=timezone.now() + datetime.timedelta(seconds=1))
+        url = reverse('vehicle_data_export')
+        response = self.client.get(url, {'vehicle_id': 'veh1', 'export': 'csv'})
+        self.assertEqual(response.status_code, 200)
+        lines = b''.join(response.streaming_content).decode().splitlines()
+        self.assertEqual(lines[0].split(',')[:2], ['id', 'vehicle_id'])
+        self.assertEqual(len(lines), 3)
+
+    def test_vehicle_data_export_gzip_negotiated(self):
+        """Should gzip the export when the client sends Accept-Encoding: gzip."""
+        self.create_vehicle_data(vehicle_id='veh1')
+        url = reverse('vehicle_data_export')
+        response = self.client.get(url, {'vehicle_id': 'veh1', 'export': 'json'}, HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        data = json.loads(gzip.decompress(b''.join(response.streaming_content)))
+        self.assertEqual(len(data), 1)
+        self.assertEqual(data[0]['vehicle_id'], 'veh1')
+
+    def test_vehicle_data_export_csv_gz_download(self):
+        """Should return a .csv.gz attachment when compress=gzip is requested."""
+        self.create_vehicle_data(vehicle_id='veh1')
+        url = reverse('vehicle_data_export')
+        response = self.client.get(url, {'vehicle_id': 'veh1', 'compress': 'gzip'})
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('veh1.csv.gz', response['Content-Disposition'])
+        self.assertFalse(response.has_header('Content-Encoding'))
+        self.assertEqual(len(gzip.decompress(b''.join(response.streaming_content)).splitlines()), 2)
+
+    def test_vehicle_data_upload_chunk_rejects_unknown_encoding(self):
+        """Should reject chunks declared with an unsupported encoding."""
+        url = reverse('vehicle_data_upload_chunk')
+        chunk = SimpleUploadedFile('chunk', b'data')
+        response = self.client.post(url, {'chunk': chunk, 'file_name': 'f.csv', 'chunk_index': 0, 'encoding': 'lzma'}, format='multipart')
+        self.assertEqual(response.status_code, 400)
+
+    def test_vehicle_data_rejects_not_found(self):
+        """Should return 404 for an unknown reject file."""
+        url = reverse('vehicle_data_rejects', kwargs={'reject_id': '00000000-0000-0000-0000-000000000000'})
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 404)
+
+    def test_vehicle_data_finalize_upload(self):
+        """Should COPY valid rows, skip duplicates, and write bad rows to a downloadable reject file."""
+        if connection.vendor != 'postgresql':
+            self.skipTest('finalize uses PostgreSQL COPY')
+        self.create_vehicle_data(vehicle_id='veh1', timestamp=dateparse.parse_datetime('2022-07-12T16:42:25Z'))
+        body = (
+            b'timestamp,speed,odometer,soc,elevation,shift_state\n'
+            b'2022-07-12 16:42:25,NULL,40800.6,58,92,NULL\n'
+            b'2022-07-12 16:42:26,10,40800.7,58,92,D\n'
+            b'2022-07-12 16:42:27,NULL,40800.8,abc,92,NULL\n'
+            b'2022-07-12 16:42:28,12,40800.9,57,93,D\n'
+        )
+        with tempfile.TemporaryDirectory() as media_root, override_settings(MEDIA_ROOT=media_root):
+            # Split mid-line: chunks are raw byte ranges, not rows
+            for index, part in enumerate((body[:70], body[70:])):
+                chunk = SimpleUploadedFile('chunk', part)
+                response = self.client.post(reverse('vehicle_data_upload_chunk'), {
+                    'chunk': chunk, 'file_name': 'f.csv', 'chunk_index': index,
+                }, format='multipart')
+                self.assertEqual(response.status_code, 200)
+            response = self.client.post(reverse('vehicle_data_finalize_upload'), {
+                'file_name': 'f.csv', 'total_chunks': 2, 'vehicle_id': 'veh1',
+            }, format='json')
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response.data['accepted'], 3)
+            self.assertEqual(response.data['rejected'], 1)
+            self.assertEqual(response.data['deduplicated'], 1)
+            self.assertEqual(response.data['inserted'], 2)
+            self.assertEqual(VehicleData.objects.filter(vehicle_id='veh1').count(), 3)
+
+            rejects = self.client.get(response.data['reject_file'])
+            self.assertEqual(rejects.status_code, 200)
+            rows = list(csv.reader(b''.join(rejects.streaming_content).decode().splitlines()))
+            self.assertEqual(rows, [
+                ['line', 'reason', 'raw'],
+                ['4', 'non-numeric soc', '2022-07-12 16:42:27,NULL,40800.8,abc,92,NULL'],
+            ])
+            self.assertEqual(os.listdir(os.path.join(media_root, 'temp_chunks')), [])
+
+    def test_vehicle_data_finalize_rejects_truncated_gzip(self):
+        """Should answer 400 for a corrupt compressed upload and still remove its chunks."""
+        if connection.vendor != 'postgresql':
+            self.skipTest('finalize uses PostgreSQL COPY')
+        body = gzip.compress(b'timestamp,speed,odometer,soc,elevation,shift_state\n' * 1000)
+        with tempfile.TemporaryDirectory() as media_root, override_settings(MEDIA_ROOT=media_root):
+            response = self.client.post(reverse('vehicle_data_upload_chunk'), {
+                'chunk': SimpleUploadedFile('chunk', body[:len(body) // 2]), 'file_name': 'f.csv.gz', 'chunk_index': 0,
+            }, format='multipart')
+            self.assertEqual(response.status_code, 200)
+            response = self.client.post(reverse('vehicle_data_finalize_upload'), {
+                'file_name': 'f.csv.gz', 'total_chunks': 1, 'vehicle_id': 'veh1', 'encoding': 'gzip',
+            }, format='json')
+            self.assertEqual(response.status_code, 400)
+            self.assertIn('truncated', response.data['detail'])
+            self.assertEqual(os.listdir(os.path.join(media_root, 'temp_chunks')), [])
@@ -1,5 +1,5 @@
 from django.urls import path
-from .views import VehicleDataListCreateView,  VehicleDataDetailView, VehicleDataChunkUploadView, VehicleDataFinalizeUploadView, VehicleDataExportView
+from .views import VehicleDataListCreateView,  VehicleDataDetailView, VehicleDataChunkUploadView, VehicleDataFinalizeUploadView, VehicleDataExportView, VehicleDataRejectsView, VehicleDataStreamView
 
 urlpatterns = [
     path('vehicle_data/', VehicleDataListCreateView.as_view(), name='vehicle_data_list_create'),
@@ -7,4 +7,6 @@ urlpatterns = [
     path('vehicle_data/upload_chunk/', VehicleDataChunkUploadView.as_view(), name='vehicle_data_upload_chunk'),
     path('vehicle_data/finalize_upload/', VehicleDataFinalizeUploadView.as_view(), name='vehicle_data_finalize_upload'),
     path('vehicle_data/export/', VehicleDataExportView.as_view(), name='vehicle_data_export'),
+    path('vehicle_data/rejects/<uuid:reject_id>/', VehicleDataRejectsView.as_view(), name='vehicle_data_rejects'),
+    path('vehicle_data/stream/', VehicleDataStreamView.as_view(), name='vehicle_data_stream'),
 ] 
\ No newline at end of file
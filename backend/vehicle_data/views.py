@@ -1,33 +1,34 @@
-from django.shortcuts import render
 from rest_framework import generics, status, filters
 from rest_framework.response import Response
 from rest_framework.views import APIView
 from .models import VehicleData
 from .serializers import VehicleDataSerializer
 import csv
-from django.utils.dateparse import parse_datetime
-from django.core.files.storage import default_storage
 import os
 from django.conf import settings
-import psycopg2
-from django.db import connection
+from django.db import connection, transaction
+from django.urls import reverse
 import logging
 from .pagination import CustomPageNumberPagination
 from django.utils import timezone
 from datetime import timezone as dt_timezone
 from .utils import ensure_aware_utc
-from dateutil import parser as dateutil_parser
-from pytz import timezone as pytz_timezone
-from rest_framework.decorators import action
-from rest_framework.parsers import JSONParser
-from rest_framework.renderers import JSONRenderer
-import pandas as pd
-from django.http import HttpResponse
+from .ingest import MissingColumnsError, iter_validated_batches, open_csv_text, prune_reject_files, reject_file_path, to_csv_bytes
+from .archive import TieredQuerySet, archived_vehicle_ids, iter_archived, with_archive
+from .live import TooManySubscribers, listener as live_listener, notify_ingest
+from rest_framework.renderers import BaseRenderer, JSONRenderer
+from django.http import FileResponse, HttpResponse, StreamingHttpResponse
+from django.utils.cache import patch_vary_headers
+from .compression import DecompressionError, available_upload_encodings, compress_stream, open_upload, negotiate_encoding, available_response_encodings
 import io
 import json
+import queue
+import uuid
 from django.core.serializers.json import DjangoJSONEncoder
 
 # Create your views here.
+# Heavy dependencies (pandas, dateutil, pytz, pyarrow) are imported on first use so that
+# importing this module stays cheap; gunicorn.conf.py preloads them once in the master.
 
 logger = logging.getLogger(__name__)
 
@@ -47,75 +48,124 @@ class VehicleDataListCreateView(generics.ListCreateAPIView):
         logger.info("VehicleDataListCreateView GET called")
         logger.info(request.query_params)
         response = super().get(request, *args, **kwargs)
-        # Add unique vehicle IDs to the response
-        vehicle_ids = VehicleData.objects.values_list('vehicle_id', flat=True).distinct()
+        # Add unique vehicle IDs (live and archived) to the response
+        vehicle_ids = list(VehicleData.objects.values_list('vehicle_id', flat=True).distinct())
+        live_ids = set(vehicle_ids)
+        vehicle_ids += [v for v in archived_vehicle_ids() if v not in live_ids]
         if hasattr(response, 'data') and isinstance(response.data, dict):
-            response.data['vehicleIDs'] = list(vehicle_ids)
+            response.data['vehicleIDs'] = vehicle_ids
         return response
 
+    def perform_create(self, serializer):
+        # POST: Save the record and push it to live stream subscribers.
+        instance = serializer.save()
+        with connection.cursor() as cur:
+            notify_ingest(cur, {
+                'vehicle_id': instance.vehicle_id,
+                'inserted': 1,
+                'first_timestamp': instance.timestamp,
+                'last_timestamp': instance.timestamp,
+                'latest': serializer.data,
+            })
+
     def get_queryset(self):
         # Build queryset with optional filters for vehicle_id, timestamp range, and ordering.
         # Handles timezone-aware filtering for timestamps.
         queryset = super().get_queryset()
+        vehicle_id, initial_dt, final_dt = self.get_filters()
+        ordering = self.request.query_params.get('ordering')
+        if vehicle_id:
+            queryset = queryset.filter(vehicle_id=vehicle_id)
+        if initial_dt:
+            queryset = queryset.filter(timestamp__gte=initial_dt)
+        if final_dt:
+            queryset = queryset.filter(timestamp__lte=final_dt)
+        if ordering:
+            queryset = queryset.order_by(ordering)
+        logger.info(f"Final queryset SQL: {str(queryset.query)}")
+        return queryset
+
+    def get_filters(self):
+        # Parse vehicle_id and the timestamp range from the query params into UTC datetimes.
+        # Cached per request: the live queryset and the archive read share the same filters.
+        if getattr(self, '_filters', None) is not None:
+            return self._filters
         vehicle_id = self.request.query_params.get('vehicle_id')
         initial_timestamp = self.request.query_params.get('initial_timestamp')
         final_timestamp = self.request.query_params.get('final_timestamp')
-        ordering = self.request.query_params.get('ordering')
         user_timezone = self.request.query_params.get('timezone')
         logger.info(f"initial_timestamp={initial_timestamp}, final_timestamp={final_timestamp}, user_timezone={user_timezone}")
         tz = None
         if user_timezone:
+            from pytz import timezone as pytz_timezone
             try:
                 tz = pytz_timezone(user_timezone)
             except Exception:
                 logger.warning(f"Invalid timezone provided: {user_timezone}")
                 tz = None
-        if vehicle_id:
-            queryset = queryset.filter(vehicle_id=vehicle_id)
+        initial_dt = final_dt = None
         if initial_timestamp:
             dt = parse_any_datetime(initial_timestamp)
             logger.info(f"Parsed initial_timestamp: {dt}")
             if dt and tz:
                 dt = tz.localize(dt) if timezone.is_naive(dt) else dt.astimezone(tz)
                 dt = dt.astimezone(dt_timezone.utc)
-            dt = ensure_aware_utc(dt)
-            if dt:
-                queryset = queryset.filter(timestamp__gte=dt)
+            initial_dt = ensure_aware_utc(dt)
         if final_timestamp:
             dt = parse_any_datetime(final_timestamp)
             logger.info(f"Parsed final_timestamp: {dt}")
             if dt and tz:
                 dt = tz.localize(dt) if timezone.is_naive(dt) else dt.astimezone(tz)
                 dt = dt.astimezone(dt_timezone.utc)
-            dt = ensure_aware_utc(dt)
-            if dt:
-                queryset = queryset.filter(timestamp__lte=dt)
-        if ordering:
-            queryset = queryset.order_by(ordering)
-        logger.info(f"Final queryset SQL: {str(queryset.query)}")
-        return queryset
+            final_dt = ensure_aware_utc(dt)
+        self._filters = (vehicle_id, initial_dt, final_dt)
+        return self._filters
+
+    def filter_queryset(self, queryset):
+        # Apply ordering, then merge in archived rows that match the same filters.
+        return self.with_archive(super().filter_queryset(queryset))
+
+    def with_archive(self, queryset):
+        # Transparently include cold rows from the Parquet archive (see archive.py).
+        vehicle_id, initial_dt, final_dt = self.get_filters()
+        return with_archive(queryset, vehicle_id, initial_dt, final_dt)
+
+# Pseudo-buffer for csv.writer: returns each formatted row instead of storing it,
+# so rows can be yielded straight into a StreamingHttpResponse.
+class Echo:
+    def write(self, value):
+        return value
+
+# File extension and content type for compressed downloads (?compress=gzip|zstd|br).
+COMPRESSED_DOWNLOADS = {
+    'gzip': ('gz', 'application/gzip'),
+    'zstd': ('zst', 'application/zstd'),
+    'br': ('br', 'application/x-brotli'),
+}
 
 # VehicleDataExportView: Exports filtered vehicle data as CSV, JSON, or Excel.
+# CSV and JSON are streamed row by row and optionally compressed on the fly,
+# either via Accept-Encoding negotiation or as a compressed file download.
 class VehicleDataExportView(APIView):
+    EXPORT_CHUNK_SIZE = 2000  # Rows fetched per database round trip while streaming
+
     def get(self, request, *args, **kwargs):
         # GET: Export vehicle data in the requested format (csv, json, xlsx).
         # Uses same filtering logic as list view.
         export_format = request.query_params.get('export', 'csv')
+        compress = request.query_params.get('compress')
+        if compress and compress not in available_response_encodings():
+            return Response({'detail': f'Unsupported compression: {compress}'}, status=status.HTTP_400_BAD_REQUEST)
         # Use the same filtering logic as get_queryset
         view = VehicleDataListCreateView()
         view.request = request
-        queryset = view.get_queryset()
-        data = list(queryset.values())
+        queryset = view.with_archive(view.get_queryset())
         vehicle_id = request.query_params.get('vehicle_id', 'vehicle_data')
         filename_base = vehicle_id if vehicle_id else 'vehicle_data'
-        if export_format == 'json':
-            response = HttpResponse(
-                json.dumps(data, cls=DjangoJSONEncoder),
-                content_type='application/json'
-            )
-            response['Content-Disposition'] = f'attachment; filename={filename_base}.json'
-            return response
-        elif export_format == 'xlsx':
+        if export_format == 'xlsx':
+            # xlsx is already a zip container, so it is never compressed again.
+            import pandas as pd
+            data = list(self.iter_rows(queryset))
             df = pd.DataFrame(data)
             for col in df.select_dtypes(include=['datetimetz']).columns:
                 df[col] = df[col].dt.tz_localize(None)
@@ -126,15 +176,51 @@ class VehicleDataExportView(APIView):
             response = HttpResponse(output.read(), content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet')
             response['Content-Disposition'] = f'attachment; filename={filename_base}.xlsx'
             return response
+        if export_format == 'json':
+            rows = self.stream_json(queryset)
+            content_type = 'application/json'
+            filename = f'{filename_base}.json'
         else:  # CSV
-            response = HttpResponse(content_type='text/csv')
-            response['Content-Disposition'] = f'attachment; filename={filename_base}.csv'
-            writer = csv.writer(response)
-            if data:
-                writer.writerow(data[0].keys())
-                for row in data:
-                    writer.writerow(row.values())
+            rows = self.stream_csv(queryset)
+            content_type = 'text/csv'
+            filename = f'{filename_base}.csv'
+
+        if compress:
+            # Explicit compressed download, e.g. vehicle.csv.gz
+            extension, content_type = COMPRESSED_DOWNLOADS[compress]
+            response = StreamingHttpResponse(compress_stream(rows, compress), content_type=content_type)
+            response['Content-Disposition'] = f'attachment; filename={filename}.{extension}'
             return response
+        encoding = negotiate_encoding(request.META.get('HTTP_ACCEPT_ENCODING', ''))
+        if encoding:
+            response = StreamingHttpResponse(compress_stream(rows, encoding), content_type=content_type)
+            response['Content-Encoding'] = encoding
+        else:
+            response = StreamingHttpResponse(rows, content_type=content_type)
+        patch_vary_headers(response, ('Accept-Encoding',))
+        response['Content-Disposition'] = f'attachment; filename={filename}'
+        return response
+
+    def iter_rows(self, queryset):
+        # Iterate rows as dicts, merging archived rows when the queryset is tiered.
+        if isinstance(queryset, TieredQuerySet):
+            return queryset.values_iterator(chunk_size=self.EXPORT_CHUNK_SIZE)
+        return queryset.values().iterator(chunk_size=self.EXPORT_CHUNK_SIZE)
+
+    def stream_csv(self, queryset):
+        # Yield the CSV header and rows without materializing the queryset.
+        fields = [f.attname for f in VehicleData._meta.concrete_fields]
+        writer = csv.writer(Echo())
+        yield writer.writerow(fields)
+        for row in self.iter_rows(queryset):
+            yield writer.writerow([row[f] for f in fields])
+
+    def stream_json(self, queryset):
+        # Yield a JSON array one object at a time.
+        yield '['
+        for i, row in enumerate(self.iter_rows(queryset)):
+            yield (', ' if i else '') + json.dumps(row, cls=DjangoJSONEncoder)
+        yield ']'
 
 # VehicleDataDetailView: Retrieve a single vehicle data record by ID.
 class VehicleDataDetailView(generics.RetrieveAPIView):
@@ -147,6 +233,8 @@ class VehicleDataDetailView(generics.RetrieveAPIView):
 
 # VehicleDataChunkUploadView: Receives a single file chunk and saves it to disk.
 # Used for chunked CSV uploads to support large files.
+# Chunks may be slices of a gzip or zstd compressed CSV; they are stored as-is
+# and decompressed incrementally when the upload is finalized.
 class VehicleDataChunkUploadView(APIView):
     def post(self, request, *args, **kwargs):
         # POST: Save a single chunk to a temporary directory.
@@ -154,6 +242,9 @@ class VehicleDataChunkUploadView(APIView):
         file_name = request.POST['file_name']
         print(file_name)
         chunk_index = request.POST['chunk_index']
+        encoding = request.POST.get('encoding')
+        if encoding and encoding not in available_upload_encodings():
+            return Response({'detail': f'Unsupported encoding: {encoding}'}, status=status.HTTP_400_BAD_REQUEST)
         temp_dir = os.path.join(settings.MEDIA_ROOT, 'temp_chunks')
         os.makedirs(temp_dir, exist_ok=True)
         chunk_path = os.path.join(temp_dir, f'{file_name}_part_{chunk_index}')
@@ -164,6 +255,10 @@ class VehicleDataChunkUploadView(APIView):
 
 # VehicleDataFinalizeUploadView: Reassembles chunks, processes CSV, and bulk inserts data.
 # Handles validation, adds vehicle_id, and streams data into PostgreSQL efficiently.
+# Compressed uploads (gzip/zstd) are decompressed as they are read; the chunks stream straight
+# into validation without an intermediate file.
+# Rows are validated in vectorized batches before COPY: bad rows go to a downloadable
+# reject file instead of failing the whole upload.
 class VehicleDataFinalizeUploadView(APIView):
     def post(self, request, *args, **kwargs):
         # POST: Reassemble file, validate CSV, add vehicle_id, and stream insert into DB.
@@ -171,43 +266,28 @@ class VehicleDataFinalizeUploadView(APIView):
         file_name = request.data['file_name']
         total_chunks = int(request.data['total_chunks'])
         vehicle_id = request.data['vehicle_id']
+        encoding = request.data.get('encoding')  # Optional; sniffed from the data when omitted
         temp_dir = os.path.join(settings.MEDIA_ROOT, 'temp_chunks')
-        final_path = os.path.join(temp_dir, file_name)
-        temp_csv_path = final_path + '.with_id.csv'
-        print(temp_csv_path)
+        chunk_paths = [os.path.join(temp_dir, f'{file_name}_part_{i}') for i in range(total_chunks)]
+        reject_id = uuid.uuid4()
+        reject_path = reject_file_path(reject_id)
+        keep_rejects = False
 
         try:
-            # Reassemble
-            logger.info(f"Reassembling {file_name} from {total_chunks} chunks.")
-            with open(final_path, 'wb') as final_file:
-                for i in range(total_chunks):
-                    chunk_path = os.path.join(temp_dir, f'{file_name}_part_{i}')
-                    with open(chunk_path, 'rb') as chunk_file:
-                        final_file.write(chunk_file.read())
-                    os.remove(chunk_path)
+            if encoding and encoding not in available_upload_encodings():
+                return Response({'detail': f'Unsupported encoding: {encoding}'}, status=status.HTTP_400_BAD_REQUEST)
 
-            # Prepare temp CSV with vehicle_id
-            logger.info(f"Creating temp CSV with vehicle_id for {file_name}.")
-            with open(final_path, 'r', encoding='utf-8') as infile, open(temp_csv_path, 'w', encoding='utf-8', newline='') as outfile:
-                reader = csv.DictReader(infile)
-                if not reader.fieldnames or set(['timestamp', 'speed', 'odometer', 'soc', 'elevation', 'shift_state']) - set(reader.fieldnames):
-                    logger.error("CSV header missing required columns.")
-                    return Response({'detail': 'CSV header missing required columns.'}, status=status.HTTP_400_BAD_REQUEST)
-                fieldnames = reader.fieldnames + ['vehicle_id']
-                writer = csv.DictWriter(outfile, fieldnames=fieldnames)
-                writer.writeheader()
-                for row in reader:
-                    # Convert 'NULL' (case-insensitive) to empty string for all fields
-                    for k, v in row.items():
-                        if isinstance(v, str) and v.strip().upper() == "NULL":
-                            row[k] = ""
-                    row['vehicle_id'] = vehicle_id
-                    writer.writerow(row)
-
-            # Streaming insert
-            logger.info(f"Streaming insert into PostgreSQL for {file_name}.")
-            with connection.cursor() as cur, open(temp_csv_path, 'r', encoding='utf-8') as f:
-                next(f)  # skip header
+            # Validate in batches and stream good rows into a temp table
+            pruned = prune_reject_files()
+            if pruned:
+                logger.info(f"Pruned {pruned} expired reject files.")
+            logger.info(f"Validating and streaming {file_name} from {total_chunks} chunks into PostgreSQL.")
+            os.makedirs(os.path.dirname(reject_path), exist_ok=True)
+            accepted = rejected = 0
+            # Chunks are read in order and decompressed on the fly, capped at UPLOAD_MAX_DECOMPRESSED_SIZE
+            upload = open_upload(chunk_paths, encoding, max_size=settings.UPLOAD_MAX_DECOMPRESSED_SIZE)
+            with transaction.atomic(), connection.cursor() as cur, open_csv_text(upload) as csv_text, \
+                    open(reject_path, 'wb') as reject_file:
                 cur.execute("""
                 CREATE TEMP TABLE temp_vehicle_data (
                     timestamp TIMESTAMPTZ,
@@ -217,37 +297,173 @@ class VehicleDataFinalizeUploadView(APIView):
                     elevation FLOAT,
                     shift_state VARCHAR,
                     vehicle_id VARCHAR
-                )
+                ) ON COMMIT DROP
                 """)
                 sql = """
                 COPY temp_vehicle_data (timestamp, speed, odometer, soc, elevation, shift_state, vehicle_id)
                 FROM STDIN WITH (FORMAT CSV)
                 """
-                cur.copy_expert(sql, f)
+                for valid, rejects in iter_validated_batches(csv_text, vehicle_id):
+                    if len(valid):
+                        cur.copy_expert(sql, io.BytesIO(to_csv_bytes(valid)))
+                    if len(rejects):
+                        reject_file.write(to_csv_bytes(rejects, header=rejected == 0))
+                    accepted += len(valid)
+                    rejected += len(rejects)
+
+                # Rows already in the Parquet archive count as duplicates, like existing live rows
+                self.drop_archived_duplicates(cur, vehicle_id)
 
+                # Insert and summarize the newly inserted rows in one pass for live subscribers
                 cur.execute("""
-                INSERT INTO vehicle_data_vehicledata (timestamp, speed, odometer, soc, elevation, shift_state, vehicle_id)
-                SELECT timestamp, speed, odometer, soc, elevation, shift_state, vehicle_id
-                FROM temp_vehicle_data
-                ON CONFLICT (timestamp, vehicle_id) DO NOTHING
+                WITH inserted AS (
+                    INSERT INTO vehicle_data_vehicledata (timestamp, speed, odometer, soc, elevation, shift_state, vehicle_id)
+                    SELECT timestamp, speed, odometer, soc, elevation, shift_state, vehicle_id
+                    FROM temp_vehicle_data
+                    ON CONFLICT (timestamp, vehicle_id) DO NOTHING
+                    RETURNING timestamp, speed, odometer, soc, elevation, shift_state
+                )
+                SELECT count(*), min(timestamp), max(timestamp), avg(speed), max(speed), min(soc), max(soc)
+                FROM inserted
                 """)
+                inserted, first_ts, last_ts, avg_speed, max_speed, min_soc, max_soc = cur.fetchone()
+                if inserted:
+                    # Delivered to LISTENers only when this transaction commits
+                    latest = VehicleData.objects.filter(vehicle_id=vehicle_id, timestamp=last_ts).values().first()
+                    notify_ingest(cur, {
+                        'vehicle_id': vehicle_id,
+                        'inserted': inserted,
+                        'first_timestamp': first_ts,
+                        'last_timestamp': last_ts,
+                        'avg_speed': avg_speed,
+                        'max_speed': max_speed,
+                        'min_soc': min_soc,
+                        'max_soc': max_soc,
+                        'latest': latest,
+                    })
 
-            logger.info(f"Successfully processed {file_name}.")
+            logger.info(f"Successfully processed {file_name}: {inserted} inserted, {rejected} rejected.")
 
-            return Response({'status': 'file reassembled and processed (streaming insert)'})
+            result = {
+                'status': 'file reassembled and processed (streaming insert)',
+                'accepted': accepted,
+                'rejected': rejected,
+                'deduplicated': accepted - inserted,
+                'inserted': inserted,
+            }
+            if rejected:
+                keep_rejects = True
+                result['reject_file'] = request.build_absolute_uri(
+                    reverse('vehicle_data_rejects', kwargs={'reject_id': reject_id})
+                )
+            return Response(result)
 
+        except MissingColumnsError as e:
+            logger.error(str(e))
+            return Response({'detail': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        except DecompressionError as e:
+            logger.error(f"Could not decompress {file_name}: {e}")
+            return Response({'detail': str(e)}, status=status.HTTP_400_BAD_REQUEST)
         except Exception as e:
             logger.exception(f"Error processing {file_name}: {e}")
             return Response({'detail': f'Error processing file: {str(e)}'}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
         finally:
-            # Cleanup temp files
-            if os.path.exists(final_path):
-                os.remove(final_path)
-            if os.path.exists(temp_csv_path):
-                os.remove(temp_csv_path)
+            # Cleanup temp files; the reject file is kept only for successful uploads with bad rows
+            for chunk_path in chunk_paths:
+                if os.path.exists(chunk_path):
+                    os.remove(chunk_path)
+            if not keep_rejects and os.path.exists(reject_path):
+                os.remove(reject_path)
+
+    def drop_archived_duplicates(self, cur, vehicle_id):
+        # Delete staged rows whose timestamp is already archived for this vehicle.
+        # Archived timestamps in the staged time range are COPYed into a second temp table.
+        cur.execute("SELECT min(timestamp), max(timestamp) FROM temp_vehicle_data")
+        first_ts, last_ts = cur.fetchone()
+        if first_ts is None:
+            return
+        archived = iter_archived(vehicle_id, first_ts, last_ts, columns=['timestamp'])
+        buffer = io.StringIO()
+        for row in archived:
+            buffer.write(row['timestamp'].isoformat() + '\n')
+        if not buffer.tell():
+            return
+        buffer.seek(0)
+        cur.execute("CREATE TEMP TABLE temp_archived_timestamps (timestamp TIMESTAMPTZ) ON COMMIT DROP")
+        cur.copy_expert("COPY temp_archived_timestamps (timestamp) FROM STDIN", buffer)
+        cur.execute("""
+        DELETE FROM temp_vehicle_data t
+        USING temp_archived_timestamps a
+        WHERE t.timestamp = a.timestamp
+        """)
+
+# VehicleDataRejectsView: Download the rows rejected while finalizing an upload,
+# with their line numbers and the reasons they were rejected.
+class VehicleDataRejectsView(APIView):
+    def get(self, request, reject_id, *args, **kwargs):
+        path = reject_file_path(reject_id)
+        if not os.path.exists(path):
+            return Response({'detail': 'Reject file not found.'}, status=status.HTTP_404_NOT_FOUND)
+        return FileResponse(open(path, 'rb'), as_attachment=True, filename=f'{reject_id}_rejects.csv', content_type='text/csv')
+
+# EventStreamRenderer: Lets DRF content negotiation accept `Accept: text/event-stream`.
+class EventStreamRenderer(BaseRenderer):
+    media_type = 'text/event-stream'
+    format = 'event-stream'
+    charset = 'utf-8'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        # Stream bodies bypass rendering; this only formats error responses as a data frame.
+        # A Retry-After header is repeated as the SSE `retry:` field (in milliseconds).
+        response = (renderer_context or {}).get('response')
+        retry = ''
+        if response is not None and response.has_header('Retry-After'):
+            retry = f"retry: {int(response['Retry-After']) * 1000}\n"
+        return f"{retry}data: {json.dumps(data, cls=DjangoJSONEncoder)}\n\n".encode(self.charset)
+
+# VehicleDataStreamView: Server-Sent Events stream of newly ingested data.
+# Subscribe to one or more vehicles (?vehicle_id=a,b) or the whole fleet (no vehicle_id).
+# Events come from PostgreSQL LISTEN/NOTIFY through one listener shared by the whole process.
+# Each open stream holds a worker thread, so streams are capped per process (LIVE_MAX_STREAMS);
+# clients over the cap get a 503 with Retry-After and reconnect later.
+class VehicleDataStreamView(APIView):
+    renderer_classes = [EventStreamRenderer, JSONRenderer]
+    KEEPALIVE_SECONDS = 15  # Comment lines keep proxies from closing idle streams
+
+    def get(self, request, *args, **kwargs):
+        if connection.vendor != 'postgresql':
+            return Response({'detail': 'Live stream requires PostgreSQL.'}, status=status.HTTP_503_SERVICE_UNAVAILABLE)
+        vehicle_ids = [v for value in request.query_params.getlist('vehicle_id') for v in value.split(',') if v]
+        try:
+            subscription = live_listener.subscribe(vehicle_ids)
+        except TooManySubscribers:
+            return Response(
+                {'detail': 'Too many live streams on this server, retry later.'},
+                status=status.HTTP_503_SERVICE_UNAVAILABLE,
+                headers={'Retry-After': str(settings.LIVE_RETRY_SECONDS)},
+            )
+        response = StreamingHttpResponse(self.event_stream(subscription), content_type='text/event-stream')
+        response['Cache-Control'] = 'no-cache'
+        response['X-Accel-Buffering'] = 'no'  # Disable proxy buffering (nginx)
+        return response
+
+    def event_stream(self, subscription):
+        # Yield SSE frames until the client disconnects (the server then closes this generator).
+        try:
+            yield 'retry: 5000\n\n'
+            while True:
+                try:
+                    payload = subscription.get(timeout=self.KEEPALIVE_SECONDS)
+                except queue.Empty:
+                    yield ': keep-alive\n\n'
+                    continue
+                yield f"event: ingest\ndata: {json.dumps(payload, cls=DjangoJSONEncoder)}\n\n"
+        finally:
+            live_listener.unsubscribe(subscription)
 
 # parse_any_datetime: Helper to parse datetimes from query params.
 def parse_any_datetime(dt_str):
+    from dateutil import parser as dateutil_parser
     try:
         return dateutil_parser.parse(dt_str)
     except Exception:
@@ -1,6 +1,6 @@
 "use client";
 
-import { useEffect, useState } from "react";
+import { useEffect, useRef, useState } from "react";
 import axios from "axios";
 import { uploadFileInChunks } from "@/utils";
 import LineChart from "@/components/chart";
@@ -16,6 +16,18 @@ interface VehicleData {
   shift_state?: string;
 }
 
+// Payload of an "ingest" Server-Sent Event (see backend vehicle_data/live.py).
+interface IngestEvent {
+  vehicle_id: string;
+  inserted: number;
+  first_timestamp: string;
+  last_timestamp: string;
+  latest?: VehicleData;
+}
+
+// Pause before reopening a live stream the browser gave up on (e.g. a 503 when the server is full).
+const STREAM_RETRY_MS = 10000;
+
 export default function Home() {
   const baseUrl = process.env.NEXT_PUBLIC_API_BASE_URL;
   const [vehicleId, setVehicleId] = useState<string>("");
@@ -23,6 +35,7 @@ export default function Home() {
   const [data, setData] = useState<VehicleData[]>([]);
   const [currentPage, setCurrentPage] = useState(1);
   const [totalPages, setTotalPages] = useState(1);
+  const [totalCount, setTotalCount] = useState(0);
   const [pageSize, setPageSize] = useState(10);
   const [pageInput, setPageInput] = useState("1");
   const [uploadProgress, setUploadProgress] = useState<number | null>(null);
@@ -52,10 +65,9 @@ export default function Home() {
       if (column)
         url += `&ordering=${direction === "desc" ? "-" : ""}${column}`;
       const res = await axios.get(url);
-      const pages = Math.ceil(res.data.count / pageSize);
       setData(res.data.results);
+      setTotalCount(res.data.count);
       setCurrentPage(page);
-      setTotalPages(isNaN(pages) || pages < 1 ? 1 : pages);
       setPageInput(page.toString());
 
       // Extract unique vehicle IDs from the results
@@ -108,6 +120,82 @@ export default function Home() {
     fetchData(1, pageSize, sortColumn, sortDirection);
   }, [vehicleId, pageSize, sortColumn, sortDirection]);
 
+  useEffect(() => {
+    const pages = Math.ceil(totalCount / pageSize);
+    setTotalPages(isNaN(pages) || pages < 1 ? 1 : pages);
+  }, [totalCount, pageSize]);
+
+  // Live updates: the backend pushes an "ingest" event (Server-Sent Events) whenever new data
+  // is committed for the selected vehicle (or any vehicle). The event is applied to the current
+  // view directly; the page is refetched only when its rows can actually have changed.
+  // Events can arrive faster than renders, so state is updated with functional updaters.
+  const applyIngestRef = useRef((event: IngestEvent) => {});
+  applyIngestRef.current = (event: IngestEvent) => {
+    setVehicleIds((ids) =>
+      ids.includes(event.vehicle_id) ? ids : [...ids, event.vehicle_id]
+    );
+    const first = Date.parse(event.first_timestamp);
+    const last = Date.parse(event.last_timestamp);
+    // Rows outside the selected time range never show up in the table
+    if (initialTimestamp && last < new Date(initialTimestamp).getTime()) return;
+    if (finalTimestamp && first > new Date(finalTimestamp).getTime()) return;
+
+    setTotalCount((count) => count + event.inserted);
+
+    if (sortColumn !== "timestamp") {
+      // Any page can change under another sort order
+      fetchData(currentPage, pageSize);
+      return;
+    }
+    const pageFull = data.length >= pageSize;
+    const pageEdge = data.length ? Date.parse(data[data.length - 1].timestamp) : 0;
+    if (sortDirection === "desc") {
+      // Newest first: a single new reading at the head of page 1 is prepended in place
+      const newest = data.length ? Date.parse(data[0].timestamp) : -Infinity;
+      if (currentPage === 1 && event.inserted === 1 && event.latest && last > newest) {
+        const latest = event.latest;
+        setData((rows) =>
+          rows.length && Date.parse(rows[0].timestamp) >= last
+            ? rows
+            : [latest, ...rows].slice(0, pageSize)
+        );
+        return;
+      }
+      // Rows older than everything on this (full) page only land on later pages
+      if (pageFull && last < pageEdge) return;
+    } else if (pageFull && first > pageEdge) {
+      // Oldest first: rows newer than everything on this (full) page only land on later pages
+      return;
+    }
+    fetchData(currentPage, pageSize);
+  };
+  useEffect(() => {
+    if (typeof EventSource === "undefined") return;
+    let url = `${baseUrl}/vehicle_data/stream/`;
+    if (vehicleId) url += `?vehicle_id=${encodeURIComponent(vehicleId)}`;
+    let source: EventSource | null = null;
+    let retry: ReturnType<typeof setTimeout> | undefined;
+    // The browser reconnects dropped streams by itself, but not after an error status
+    // such as 503, which leaves the source CLOSED: reopen it after a pause.
+    const connect = () => {
+      const current = new EventSource(url);
+      current.addEventListener("ingest", (e) =>
+        applyIngestRef.current(JSON.parse((e as MessageEvent).data))
+      );
+      current.onerror = () => {
+        if (current.readyState === EventSource.CLOSED) {
+          retry = setTimeout(connect, STREAM_RETRY_MS);
+        }
+      };
+      source = current;
+    };
+    connect();
+    return () => {
+      clearTimeout(retry);
+      source?.close();
+    };
+  }, [vehicleId]);
+
   const socChartData = {
     labels: (data || []).map((d) => new Date(d.timestamp).toLocaleTimeString()),
     datasets: [